@@ -0,0 +1,271 @@
+""" pyStorage benchmark suite
+
+Times (median & minimum over repeats) and peak memory (tracemalloc) of:
+    import pystorage (and pystorage.systems), in fresh interpreters
+    extractAndResampleYearlyData for each bundled country at 1 h and 0.25 h time steps, and the aligned panel
+    withInputs / update / levelisedCostOfStorage of the technology-agnostic and PNNL data-driven models
+    polyfit2d at several sizes (cold: factorisation, warm: cached factorisation)
+    optimiseDispatch over a year at 0.25 h, without and with self-discharge
+
+Usage:
+    python scripts/benchmark.py --output baseline.json            # run & save a machine-readable baseline
+    python scripts/benchmark.py --compare baseline.json           # run & flag regressions against a baseline
+    python scripts/benchmark.py --filter tariffs --repeat 3       # subset of benchmarks
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+""" Benchmarks """
+
+
+def _importBenchmark(module: str):
+
+    # Fresh interpreters per run: the import is timed in one and its peak memory measured in another, since
+    # tracemalloc slows imports down several times
+    timing = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    memory = f"import tracemalloc; tracemalloc.start(); import {module}; print(tracemalloc.get_traced_memory()[1])"
+
+    def execute(script: str) -> str:
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join([_SOURCE] + sys.path))
+        return subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                              env=environment).stdout
+
+    def run():
+        return float(execute(timing)), int(execute(memory))
+
+    run.isolated = True
+    return run
+
+
+def _benchmarks() -> dict:
+
+    import numpy as np
+    from pystorage.config import setTheScene, ureg
+    from pystorage.data import extractAndResampleYearlyData, availableCountries, availableYears, buildTariffCache, \
+        loadTariffPanel
+    from pystorage.systems import ElectricityStorageTechnology, DataDrivenElectricityStorageTechnology, \
+        optimiseDispatch
+    from pystorage.tools.math import polyfit2d, _clearFactorisations
+
+    setTheScene(country='UK', year=2024, warning=False)
+    Q_ = ureg.Quantity
+
+    benchmarks = {'import.pystorage': _importBenchmark('pystorage'),
+                  'import.pystorage.systems': _importBenchmark('pystorage.systems')}
+
+    # Electricity tariffs (binary store built beforehand: steady-state loading)
+    buildTariffCache()
+    for country in availableCountries():
+        year = int(availableYears(country)[0])
+        for timeStep in [1., 0.25]:
+            benchmarks[f'tariffs.{country}.{timeStep}h'] = \
+                lambda timeStep=timeStep, year=year, country=country: extractAndResampleYearlyData(timeStep, year,
+                                                                                                     country)
+    panel = [country for country in availableCountries() if 2020 in availableYears(country)]
+    for timeStep in [1., 0.25]:
+        benchmarks[f'tariffs.panel.{timeStep}h'] = \
+            lambda timeStep=timeStep: loadTariffPanel(panel, 2020, timeStep=timeStep)
+
+    # Techno-economic models
+    design = dict(dischargeDuration=Q_(4, 'hour'), dischargingPower=Q_(100, 'MW'), chargingPower=Q_(100, 'MW'),
+                  selfDischargeRate=Q_(0.5, '%/hour'), cyclesPerYear=100, standby=0.1, discountRate=Q_(3.5, '%'),
+                  lifetime=Q_(60, 'year'))
+    agnostic = dict(roundtripEfficiency=Q_(70, '%'), powerIslandSpecificCost=Q_(1000, 'USD/kW'),
+                    storeSpecificCost=Q_(10, 'USD/kWh'))
+    prices = dict(electricityPrice=Q_(79.68, 'USD/MWh'), gasPrice=Q_(31.27, 'USD/MWh'))
+
+    models = {
+        'agnostic': lambda: ElectricityStorageTechnology().withInputs(**design, **agnostic),
+        'PNNL': lambda: DataDrivenElectricityStorageTechnology().withInputs(dataSource='PNNL_CAES', **design)}
+
+    for name, create in models.items():
+
+        def update(create=create):
+            ES = create()
+            ES.update(**prices)
+            return ES
+
+        def LCOS(create=create):
+            ES = create()
+            ES.update(**prices)
+            return ES.levelisedCostOfStorage
+
+        benchmarks[f'model.{name}.withInputs'] = create
+        benchmarks[f'model.{name}.update'] = update
+        benchmarks[f'model.{name}.levelisedCostOfStorage'] = LCOS
+
+    # Surface fitting
+    rng = np.random.default_rng(0)
+    for size in [100, 10_000, 100_000]:
+        x, y, z = rng.random(size), rng.random(size), rng.random(size)
+
+        def cold(x=x, y=y, z=z):
+            _clearFactorisations()
+            return polyfit2d(x, y, z, nx=3, ny=3)
+
+        benchmarks[f'polyfit2d.{size}.cold'] = cold
+        benchmarks[f'polyfit2d.{size}.warm'] = lambda x=x, y=y, z=z: polyfit2d(x, y, z, nx=3, ny=3)
+
+    # Dispatch
+    tariff, _ = extractAndResampleYearlyData(0.25, 2020, 'Ireland')
+    for rate in [0., 0.005]:
+        benchmarks[f'dispatch.year.0.25h.selfDischarge{rate}'] = \
+            lambda rate=rate: optimiseDispatch(tariff, power=100., duration=4., roundtripEfficiency=0.746,
+                                               selfDischargeRate=rate)
+
+    return benchmarks
+
+
+""" Runner """
+
+
+def _measure(function, repeat: int) -> dict:
+
+    # Subprocess benchmarks report their own time & memory
+    if getattr(function, 'isolated', False):
+        runs = [function() for _ in range(repeat)]
+        times = [elapsed for elapsed, _ in runs]
+        peak = max(peak for _, peak in runs)
+    else:
+        function()  # Warm-up (lazy imports, caches)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {'time': statistics.median(times), 'minimum': min(times), 'repeat': repeat, 'peakMemory': peak}
+
+
+def runBenchmarks(*, pattern: str | None = None, repeat: int = 5, progress: bool = True) -> dict:
+
+    """
+      :param pattern:                       only run benchmarks whose name contains pattern
+      :param repeat:                        timed runs per benchmark
+    Return a machine-readable report: metadata and, per benchmark, the median & minimum time [s] and peak memory [B].
+    """
+
+    import numpy as np
+    from rich.progress import Progress
+
+    benchmarks = {name: function for name, function in _benchmarks().items()
+                  if pattern is None or pattern in name}
+
+    results = {}
+    with Progress(disable=not progress, transient=True) as bar:
+        task = bar.add_task('Benchmarks', total=len(benchmarks))
+        for name, function in benchmarks.items():
+            bar.update(task, description=name)
+            results[name] = _measure(function, repeat)
+            bar.advance(task)
+
+    metadata = {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+                'processor': platform.processor(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+    return {'metadata': metadata, 'results': results}
+
+
+def compareResults(current: dict, baseline: dict, *, tolerance: float = 0.25, memoryTolerance: float = 0.25,
+                   minimumTime: float = 1e-4) -> list[dict]:
+
+    """
+      :param tolerance:                     relative slowdown flagged as a regression (0.25: 25 % slower)
+      :param memoryTolerance:               relative increase of peak memory flagged as a regression
+      :param minimumTime:                   absolute slowdown [s] below which timings are not flagged (noise)
+    Compare two reports (runBenchmarks) benchmark by benchmark.
+    """
+
+    rows = []
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            rows.append({'name': name, 'time': result['time'], 'timeRatio': None, 'memoryRatio': None,
+                         'regression': False})
+            continue
+
+        timeRatio = result['time'] / reference['time'] if reference['time'] > 0 else float('inf')
+        memoryRatio = result['peakMemory'] / reference['peakMemory'] if reference['peakMemory'] > 0 else 1.
+        slower = timeRatio > 1 + tolerance and result['time'] - reference['time'] > minimumTime
+        larger = memoryRatio > 1 + memoryTolerance
+        rows.append({'name': name, 'time': result['time'], 'timeRatio': timeRatio, 'memoryRatio': memoryRatio,
+                     'regression': slower or larger})
+
+    return rows
+
+
+def _printReport(report: dict, comparison: list[dict] | None = None):
+
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title='pyStorage benchmarks')
+    table.add_column('Benchmark')
+    table.add_column('Time [ms]', justify='right')
+    table.add_column('Peak memory [kB]', justify='right')
+    if comparison is not None:
+        table.add_column('Time ratio', justify='right')
+        table.add_column('Memory ratio', justify='right')
+
+    rows = {row['name']: row for row in comparison or []}
+    for name, result in report['results'].items():
+        cells = [name, f"{1e3 * result['time']:.3f}", f"{result['peakMemory'] / 1e3:.1f}"]
+        if comparison is not None:
+            row = rows[name]
+            style = 'red' if row['regression'] else 'green'
+            cells += ['new' if row['timeRatio'] is None else f"[{style}]{row['timeRatio']:.2f}[/{style}]",
+                      'new' if row['memoryRatio'] is None else f"[{style}]{row['memoryRatio']:.2f}[/{style}]"]
+        table.add_row(*cells)
+
+    Console().print(table)
+
+
+def main(arguments: list[str] | None = None) -> int:
+
+    parser = argparse.ArgumentParser(description='pyStorage benchmark suite')
+    parser.add_argument('--output', help='save the report (JSON) to this path, e.g., a new baseline')
+    parser.add_argument('--compare', help='baseline report (JSON) to compare against')
+    parser.add_argument('--filter', help='only run benchmarks whose name contains this pattern')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='relative slowdown flagged as a regression')
+    arguments = parser.parse_args(arguments)
+
+    report = runBenchmarks(pattern=arguments.filter, repeat=arguments.repeat)
+
+    comparison = None
+    if arguments.compare:
+        with open(arguments.compare) as f:
+            comparison = compareResults(report, json.load(f), tolerance=arguments.tolerance)
+
+    _printReport(report, comparison)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    regressions = [row['name'] for row in comparison or [] if row['regression']]
+    if regressions:
+        print('Regressions: ' + ', '.join(regressions))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, _SOURCE)
+    sys.exit(main())
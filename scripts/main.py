@@ -7,6 +7,7 @@ import pwd
 import sys
 
 selectUnits(currency='USD')
+setTheScene(country='UK', year=2024, warning=False)
 Q_ = ureg.Quantity
 
 
@@ -1,7 +1,14 @@
-from . import systems
-from . import data
-from . import tools
-from . import components
-from . import thermophysicalProperties
-from . import config
+import importlib
 
+# Subpackages are imported on first access (PEP 562) to keep `import pystorage` cheap
+_submodules = ['systems', 'data', 'tools', 'components', 'thermophysicalProperties', 'config']
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(list(globals()) + _submodules)
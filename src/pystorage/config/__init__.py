@@ -1,8 +1,10 @@
 from __future__ import annotations
+from dataclasses import dataclass, replace
+import contextlib
+import contextvars
+import threading
 
-Year = None
-Currency = None
-Country = None
+from .__units__ import conversionFactor, canonicalUnit, toMagnitude, unit
 
 
 def defineAdditionalUnits():
@@ -17,132 +19,204 @@ def defineAdditionalUnits():
     return UnitRegistry
 
 
+""" In-memory configuration (scene & units) """
+
+
+@dataclass(frozen=True)
+class Configuration:
+    country: str | None = None
+    year: int | None = None
+    currency: str = 'USD'
+    time: str = 'hour'
+    power: str = 'kW'
+    energy: str = 'kWh'
+    efficiency: str = '%'
+    compiledUnits: bool = True  # Convert through cached factors rather than pint on every call
+
+    @property
+    def scene(self) -> dict:
+        return {'Country': self.country, 'Year': self.year}
+
+    @property
+    def units(self) -> dict:
+        return {'currency': self.currency,
+                'time': self.time,
+                'power': self.power,
+                'energy': self.energy,
+                'efficiency': self.efficiency,
+                'energySpecificCost': self.currency + '/' + self.energy,
+                'powerSpecificCost': self.currency + '/' + self.power}
+
+
+# Process-wide configuration, overridden within pystorage.config.scene() blocks (per thread / asyncio task)
+_globalConfiguration = Configuration()
+_scopedConfiguration: contextvars.ContextVar[Configuration | None] = contextvars.ContextVar(
+    'pystorageConfiguration', default=None)
+
+
+def getConfiguration() -> Configuration:
+    configuration = _scopedConfiguration.get()
+    return _globalConfiguration if configuration is None else configuration
+
+
+def _setConfiguration(configuration: Configuration):
+
+    global _globalConfiguration
+
+    if _scopedConfiguration.get() is None:
+        _globalConfiguration = configuration
+    else:
+        _scopedConfiguration.set(configuration)
+
+
+def _checkScene(country: str | None, year: int | None):
+
+    if country is not None and not isinstance(country, str):
+        raise TypeError('The input variable "country" must be a string.')
+
+    if year is not None and not isinstance(year, int):
+        raise TypeError('The input variable "year" must be a positive integer.')
+
+
+@contextlib.contextmanager
+def scene(*, country: str | None = None, year: int | None = None, **units):
+
+    """
+      :param country:                       e.g., 'UK'
+      :param year:                          year [-]
+      :param units:                         currency, time, power, energy, efficiency units and/or compiledUnits
+    Context manager scoping the scene & units to the current thread or asyncio task, e.g.:
+        with pystorage.config.scene(country='UK', year=2024, currency='GBP'):
+            ...
+    """
+
+    _checkScene(country, year)
+    changes = {key: value for key, value in dict(country=country, year=year, **units).items() if value is not None}
+
+    token = _scopedConfiguration.set(replace(getConfiguration(), **changes))
+    try:
+        yield getConfiguration()
+    finally:
+        _scopedConfiguration.reset(token)
+
+
+""" Scene & units """
+
+
 def selectUnits(*,
                 currency: str = 'USD',
                 time: str = 'hour',
                 power: str = 'kW',
                 energy: str = 'kWh',
                 efficiency: str = '%',
+                compiledUnits: bool = True,
                 ):
 
-    import csv
-    import os
-
-    fileDirectory = os.path.dirname(os.path.realpath(__file__))
-
-    units = {"currency": currency,
-             'time': time,
-             'power': power,
-             'energy': energy,
-             'efficiency': efficiency,
-             'energySpecificCost': currency + '/' + energy,
-             'powerSpecificCost': currency + '/' + power}
-
-    with open(fileDirectory + "/units.csv", "w", newline="") as f:
-        w = csv.DictWriter(f, units.keys())
-        w.writeheader()
-        w.writerow(units)
+    _setConfiguration(replace(getConfiguration(),
+                              currency=currency, time=time, power=power, energy=energy, efficiency=efficiency,
+                              compiledUnits=compiledUnits))
 
 
 def setTheScene(*, country: str | None = None, year: int | None = None, warning: bool = True, display: bool = False):
 
     from rich import print
-    import warnings
-    import csv
-    import os
 
-    fileDirectory = os.path.dirname(os.path.realpath(__file__))
+    _checkScene(country, year)
 
-    global Currency
-    global Country
-    global Year
+    configuration = getConfiguration()
+    Country = configuration.country
+    Year = configuration.year
 
     warningMessage = ''
 
     if country is not None:
 
-        if not isinstance(country, str):
-            raise TypeError('The input variable "country" must be a string.')
-
-        if Country is None:
-            Country = country
-        else:
-            if Country != country and warning:
-                warningMessage += (
-                        rf"[red]Country is already set to {Country}. " +
-                        "\n" +
-                        rf"Changing to {country} will only affect newly created objects. [/red]" + "\n")
-            Country = country
+        if Country is not None and Country != country and warning:
+            warningMessage += (
+                    rf"[red]Country is already set to {Country}. " +
+                    "\n" +
+                    rf"Changing to {country} will only affect newly created objects. [/red]" + "\n")
+        Country = country
 
     if year is not None:
 
-        if not isinstance(year, int):
-            raise TypeError('The input variable "year" must be a positive integer.')
-
-        if Year is None:
-            Year = year
-        else:
-            if Year != year and warning:
-                warningMessage += (
-                        rf"[red]Year is already set to {Year}." +
-                        "\n" +
-                        rf"Changing to {year} will only affect newly created objects. [/red]" + "\n")
+        if Year is not None and Year != year and warning:
+            warningMessage += (
+                    rf"[red]Year is already set to {Year}." +
+                    "\n" +
+                    rf"Changing to {year} will only affect newly created objects. [/red]" + "\n")
+        Year = year
 
-            Year = year
-
-    scene = {"Country": Country, "Year": Year}
+    _setConfiguration(replace(configuration, country=Country, year=Year))
 
     if display:
         print('\n' + rf'[bold green]Scene newly set: {Country} in {Year}[/bold green]' + '\n')
     if warning and warningMessage:
         print(warningMessage)
 
-    with open(fileDirectory + "/__scene__.csv", "w", newline="") as f:
-        w = csv.DictWriter(f, scene.keys())
-        w.writeheader()
-        w.writerow(scene)
-
 
 def getTheScene():
 
-    import os
-    import csv
+    configuration = getConfiguration()
 
-    fileDirectory = os.path.dirname(os.path.realpath(__file__))
-
-    if '__scene__.csv' not in os.listdir(fileDirectory):
+    if configuration.country is None or configuration.year is None:
         raise NotImplementedError('Country & year must be set ' +
                                   'to perform a techno-economic analysis. \n' +
                                   'Please use pystorage.config.setTheScene() function in your main script.')
-    else:  # Get the scene
-        mydict = csv.DictReader(open(fileDirectory + '/__scene__.csv'))
-        mydict = [row for row in mydict]
-        scene = mydict[0]
 
-    return scene
+    return configuration.scene
 
 
 def getUnits():
+    return getConfiguration().units
+
+
+""" Optional persistence """
+
+
+def saveConfiguration(path: str):
 
-    import os
     import csv
 
-    fileDirectory = os.path.dirname(os.path.realpath(__file__))
+    configuration = getConfiguration()
+    row = {**configuration.scene, **configuration.units}
 
-    if 'units.csv' not in os.listdir(fileDirectory):
-        raise NotImplementedError('Units (including currency) must be set ' +
-                                  'to perform a techno-economic analysis. \n' +
-                                  'Please use pystorage.config.selectUnits() function in your main script.')
-    else:  # Get the scene
-        mydict = csv.DictReader(open(fileDirectory + '/units.csv'))
-        mydict = [row for row in mydict]
-        units = mydict[0]
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, row.keys())
+        w.writeheader()
+        w.writerow(row)
+
+
+def loadConfiguration(path: str) -> Configuration:
+
+    import csv
+
+    with open(path, newline="") as f:
+        row = next(csv.DictReader(f))
+
+    _setConfiguration(Configuration(country=row['Country'] or None,
+                                    year=int(row['Year']) if row['Year'] else None,
+                                    currency=row['currency'],
+                                    time=row['time'],
+                                    power=row['power'],
+                                    energy=row['energy'],
+                                    efficiency=row['efficiency']))
+
+    return getConfiguration()
+
+
+_registryLock = threading.Lock()
 
-    return units
 
+def __getattr__(name):
 
-# Select default units
-selectUnits()
+    # The unit registry is only built when first needed, once across threads (double-checked locking: quantities
+    # from two registries cannot be combined)
+    if name == 'ureg':
+        global ureg
+        with _registryLock:
+            if 'ureg' not in globals():
+                ureg = defineAdditionalUnits()
+        return ureg
 
-# Define unit registry
-ureg = defineAdditionalUnits()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
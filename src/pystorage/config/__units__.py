@@ -0,0 +1,66 @@
+from __future__ import annotations
+import functools
+
+""" Compiled units
+
+Unit conversions are resolved once per (source unit, target unit) pair, including the currency 'conversion'
+context defined in additionalUnits.txt, and cached as plain multiplicative factors. Models validate
+dimensions at their API boundary, then compute on float64 magnitudes and only reattach units on output.
+"""
+
+
+def _registry():
+    from . import ureg
+    return ureg
+
+
+@functools.lru_cache(maxsize=None)
+def conversionFactor(source, target) -> float:
+
+    """
+      :param source:                        unit (string, pint Unit or UnitsContainer)
+      :param target:                        unit (string, pint Unit or UnitsContainer)
+    Multiplicative factor converting magnitudes from source to target units (raises DimensionalityError).
+    """
+
+    from ..tools.profiling import count
+    count('unitResolutions')  # Cache misses only
+
+    ureg = _registry()
+    return float(ureg.Quantity(1., source).to(target, 'conversion').magnitude)
+
+
+@functools.lru_cache(maxsize=None)
+def unit(name: str):
+    return _registry().Unit(name)
+
+
+@functools.lru_cache(maxsize=None)
+def canonicalUnit(source, configuration) -> tuple[str, bool] | None:
+
+    """
+      :param source:                        unit (pint UnitsContainer or string)
+      :param configuration:                 pystorage.config.Configuration (selected unit system)
+    Return the selected unit matching the dimensionality of source, and whether it is a monetary unit.
+    """
+
+    ureg = _registry()
+    dimensionality = ureg.Quantity(1., source).dimensionality
+
+    match = None
+    for name in configuration.units.values():
+        if dimensionality == ureg.Quantity(1., name).dimensionality:
+            match = (name, '[currency]' in dimensionality)
+
+    return match
+
+
+def toMagnitude(value, target: str):
+
+    """
+      :param value:                         pint Quantity
+      :param target:                        unit, e.g., 'hour'
+    Magnitude of value expressed in target units, using cached conversion factors.
+    """
+
+    return value.magnitude * conversionFactor(value._units, target)
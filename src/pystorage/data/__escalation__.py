@@ -0,0 +1,105 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import functools
+import numpy as np
+from ..tools.profiling import timed
+
+""" Cost escalation
+
+Cost figures are normalised to a target year and currency through one precomputed table, indexed by (year, currency):
+
+    index[year, currency] = CEPCI[year] * rate[currency]
+
+where rate is the exchange rate per USD (data/Currencies) and the Chemical Engineering Plant Cost Index is linearly
+interpolated between the years of data/CEPCI. A cost C expressed in (year1, currency1) is worth
+C * index[year2, currency2] / index[year1, currency1] in (year2, currency2); whole arrays of costs, base years and
+currencies are converted at once.
+"""
+
+
+@dataclass(frozen=True)
+class EscalationTable:
+    years: np.ndarray  # Every year from the first to the last CEPCI year [-]
+    currencies: tuple  # e.g., ('EUR', 'GBP', 'USD')
+    CEPCI: np.ndarray  # Per year, interpolated between the years of the data
+    interpolated: np.ndarray  # Per year, True if not in the data
+    rates: np.ndarray  # Exchange rates per USD, per currency
+    index: np.ndarray  # CEPCI * rate, shape (years, currencies)
+
+    def _yearIndex(self, year) -> np.ndarray:
+
+        year = np.asarray(year)
+        position = year - self.years[0]
+        outside = (position < 0) | (position >= len(self.years))
+        if np.any(outside):
+            raise ValueError(f'The CEPCI is not available for {np.unique(year[outside]).tolist()} '
+                             f'(data from {self.years[0]} to {self.years[-1]}).')
+
+        return position.astype(np.intp)
+
+    def _currencyIndex(self, currency) -> np.ndarray:
+
+        currency = np.asarray(currency)
+        names, inverse = np.unique(currency, return_inverse=True)
+        unknown = [name for name in names.tolist() if name not in self.currencies]
+        if unknown:
+            raise ValueError(f'No exchange rate available for {unknown}.')
+
+        return np.array([self.currencies.index(name) for name in names.tolist()], dtype=np.intp)[inverse]\
+            .reshape(currency.shape)
+
+    def cepci(self, year) -> np.ndarray:
+
+        """
+          :param year:                          year(s) [-]
+        CEPCI, interpolated between the years of the data (raises a ValueError outside).
+        """
+
+        return self.CEPCI[self._yearIndex(year)]
+
+    def factor(self, *, fromYear, toYear, fromCurrency='USD', toCurrency='USD') -> np.ndarray:
+
+        """
+          :param fromYear:                      base year(s) of the costs [-]
+          :param toYear:                        target year(s) [-]
+          :param fromCurrency:                  currency (or array of currencies) of the costs, e.g., 'GBP'
+          :param toCurrency:                    target currency (or array of currencies)
+        Multiplicative escalation factors, broadcast over the arguments.
+        """
+
+        return (self.index[self._yearIndex(toYear), self._currencyIndex(toCurrency)]
+                / self.index[self._yearIndex(fromYear), self._currencyIndex(fromCurrency)])
+
+    def convert(self, costs, *, fromYear, toYear, fromCurrency='USD', toCurrency='USD') -> np.ndarray:
+
+        """
+          :param costs:                         cost figures (magnitudes), broadcast with the other arguments
+        Costs escalated to toYear and converted to toCurrency, in one vectorised operation.
+        """
+
+        return np.asarray(costs, dtype=np.float64) * self.factor(fromYear=fromYear, toYear=toYear,
+                                                                 fromCurrency=fromCurrency, toCurrency=toCurrency)
+
+
+@functools.cache
+@timed('data.escalationTable')
+def escalationTable() -> EscalationTable:
+
+    """
+    Built once per process from data/CEPCI and data/Currencies.
+    """
+
+    from .__methods__ import loadCEPCI, loadCurrencies
+    from dataclasses import asdict
+
+    data = loadCEPCI()
+    known = data.index.to_numpy(dtype=np.int64)
+    years = np.arange(known.min(), known.max() + 1)
+    CEPCI = np.interp(years, known, data.to_numpy(dtype=np.float64))
+
+    exchangeRates = asdict(loadCurrencies())
+    currencies = tuple(sorted(exchangeRates))
+    rates = np.array([exchangeRates[name] for name in currencies], dtype=np.float64)
+
+    return EscalationTable(years=years, currencies=currencies, CEPCI=CEPCI, interpolated=~np.isin(years, known),
+                           rates=rates, index=CEPCI[:, None] * rates[None, :])
@@ -1,3 +1,40 @@
-from .__methods__ import CEPCI, Currencies, PNNL_CAES, extractAndResampleYearlyData, currencyIndex
+import importlib
 
+# Attributes resolved on first access (PEP 562): loading tariffs and datasets requires pandas & pint
+_attributes = {
+    'CEPCI': '.__methods__',
+    'Currencies': '.__methods__',
+    'PNNL_CAES': '.__methods__',
+    'extractAndResampleYearlyData': '.__methods__',
+    'resampleYearlyData': '.__methods__',
+    'iterateTariffs': '.__methods__',
+    'completeYears': '.__methods__',
+    'TariffChunk': '.__methods__',
+    'currencyIndex': '.__methods__',
+    'buildTariffCache': '.__tariffs__',
+    'loadYearlyTariff': '.__tariffs__',
+    'availableCountries': '.__tariffs__',
+    'availableYears': '.__tariffs__',
+    'TariffPanel': '.__panel__',
+    'EscalationTable': '.__escalation__',
+    'escalationTable': '.__escalation__',
+    'loadTariffPanel': '.__panel__',
+    'DataSource': '.__sources__',
+    'InterpolationIndex': '.__sources__',
+    'registerDataSource': '.__sources__',
+    'dataSource': '.__sources__',
+    'availableDataSources': '.__sources__',
+    'interpolationIndex': '.__sources__',
+}
 
+
+def __getattr__(name):
+    if name in _attributes:
+        value = getattr(importlib.import_module(_attributes[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_attributes))
@@ -1,8 +1,12 @@
 from __future__ import annotations
 from dataclasses import dataclass
+import functools
 import os
+from collections.abc import Iterator
+import numpy as np
 import pandas as pd
-from ..config import ureg
+from .__tariffs__ import loadYearlyTariff, availableYears
+from ..tools.profiling import timed, count
 
 """ Data classes """
 
@@ -14,6 +18,14 @@ class _Currencies:
     EUR: float
 
 
+@dataclass
+class TariffChunk:
+    year: int  # Calendar year of the chunk [-]
+    sourceYear: int  # Year of the data used (differs from year when cycled or extrapolated) [-]
+    tariff: pd.Series  # Electricity tariffs on a regular grid starting at the chunk start
+    unit: str  # e.g., 'EUR/MWh'
+
+
 @dataclass
 class _EnergyPrice:
     electricity: float
@@ -26,15 +38,16 @@ class _EnergyPrice:
 
 def currencyIndex(currency):
     if currency == 'USD':
-        return Currencies.USD
+        return loadCurrencies().USD
     elif currency == 'GBP':
-        return Currencies.GBP
+        return loadCurrencies().GBP
     elif currency == 'EUR':
-        return Currencies.EUR
+        return loadCurrencies().EUR
     else:
         return None
 
 
+@timed('data.extractAndResampleYearlyData')
 def extractAndResampleYearlyData(timeStep: float, year: int, country: str):
 
     """
@@ -44,60 +57,188 @@ def extractAndResampleYearlyData(timeStep: float, year: int, country: str):
     WARNING: Units used in this class are not SI units [e.g., Celsius, kWh, kW, h, £/kWh]
     """
 
-    # Extract electricity tariffs
-    if country == 'UK':
-
-        df = pd.read_csv(os.path.dirname(os.path.abspath(__file__)) + '/electricityTariffs/' + country + '.csv',
-                         sep=",| - ", engine='python')
-        df['Time'] = pd.to_datetime(df['MTU (CET/CEST)'], format="%d.%m.%Y %H:%M")
-        df = df[df['Time'].dt.strftime('%Y') == str(year)]
-        if len(df) == 0:
-            raise ValueError(f'Electricity tariff not available in {country} in {year}.')
-        df['Time'] = df['Time']
-        df = pd.Series(data=df['Day-ahead Price [GBP/MWh]'].values, index=df['Time'].values)
-        idx = df.tail(1).index[0] + (df.index[1] - df.index[0])
-        df.loc[idx] = df.iloc[-1]
-        df = df[~df.index.duplicated(keep='first')]
-        upSampled = df.resample("".join([str(timeStep), 'h']))
-        electricityTariff = upSampled.interpolate(method='linear')
-
-        unit = 'GBP/MWh'
+    # Extract electricity tariffs from the binary store (zero-copy views on a single year)
+    time, price, unit = loadYearlyTariff(year, country)
+    if len(time) == 0:
+        raise ValueError(f'Electricity tariff not available in {country} in {year}.')
 
-    else:
+    return resampleYearlyData(time, price, timeStep), unit
+
+
+@timed('data.resampleYearlyData')
+def resampleYearlyData(time, price, timeStep: float) -> pd.Series:
+
+    """
+      :param time:                          timestamps of a single year [datetime64]
+      :param price:                         electricity tariffs
+      :param timeStep:                      data set time step [h]
+    """
+
+    electricityTariff = pd.Series(data=price, index=time)
+    idx = time[-1] + (time[1] - time[0])
+    electricityTariff.loc[idx] = electricityTariff.iloc[-1]
+    electricityTariff = electricityTariff[~electricityTariff.index.duplicated(keep='first')]
+    upSampled = electricityTariff.resample("".join([str(timeStep), 'h']))
+
+    return upSampled.interpolate(method='linear')
+
+
+def _isComplete(time: np.ndarray, year: int) -> bool:
+
+    # Samples covering the whole year: from 1 January to 31 December (within one time step), without long gaps
+    if len(time) < 2:
+        return False
+    step = np.median(np.diff(time))
+    return bool(time[0] - np.datetime64(f'{year}-01-01T00:00', 'ns') <= step
+                and np.datetime64(f'{year + 1}-01-01T00:00', 'ns') - time[-1] <= step
+                and len(time) * step >= np.timedelta64(360, 'D'))
+
+
+def completeYears(country: str) -> np.ndarray:
+
+    """
+      :param country:                       e.g., 'France'
+    Years with data over the whole year (e.g., not a year starting in October or with missing months).
+    """
+
+    return np.array([int(year) for year in availableYears(country)
+                     if _isComplete(loadYearlyTariff(int(year), country)[0], int(year))], dtype=int)
+
+
+def _alignedYear(year: int, sourceYear: int, country: str, timeStep: float) -> tuple[np.ndarray, str]:
+
+    # Resample the source year, then place it on the regular grid [1 Jan, 1 Jan of the next year) of the target year
+    time, price, unit = loadYearlyTariff(sourceYear, country)
+    if not _isComplete(time, sourceYear):
+        raise ValueError(f'Electricity tariff incomplete in {country} in {sourceYear}.')
+    tariff = resampleYearlyData(time, price, timeStep)
+
+    # Gaps are interpolated within the data; only the first and last native time steps may be padded
+    start = np.datetime64(f'{sourceYear}-01-01T00:00', 'ns')
+    step = np.timedelta64(int(round(timeStep * 3600e9)), 'ns')
+    grid = pd.DatetimeIndex(np.arange(start, np.datetime64(f'{sourceYear + 1}-01-01T00:00', 'ns'), step))
+    edge = int(np.ceil(np.median(np.diff(time)) / step))
+    values = tariff.reindex(tariff.index.union(grid)).interpolate(method='time', limit_area='inside').reindex(grid)
+    values = values.ffill(limit=edge).bfill(limit=edge)
+
+    # Same position within the year (e.g., hour of year); leap days are dropped or repeated
+    start = np.datetime64(f'{year}-01-01T00:00', 'ns')
+    length = len(np.arange(start, np.datetime64(f'{year + 1}-01-01T00:00', 'ns'), step))
+    return values.values[np.minimum(np.arange(length), len(values) - 1)], unit
 
-        df = pd.read_csv(os.path.dirname(os.path.abspath(__file__)) + '/electricityTariffs/' + country + '.csv')
-        df['Datetime (UTC)'] = pd.to_datetime(df['Datetime (UTC)'])
-        df = df[df['Datetime (UTC)'].dt.strftime('%Y') == str(year)]
-        if len(df) == 0:
-            raise ValueError(f'Electricity tariff not available in {country} in {year}.')
-        df['Time'] = df['Datetime (UTC)']
-        electricityTariff = pd.Series(data=df['Price (EUR/MWhe)'].values, index=df['Datetime (UTC)'].values)
-        idx = electricityTariff.tail(1).index[0] + (df['Time'].iloc[1] - df['Time'].iloc[0])
-        electricityTariff.loc[idx] = electricityTariff.iloc[-1]
-        upSampled = electricityTariff.resample("".join([str(timeStep), 'h']))
-        electricityTariff = upSampled.interpolate(method='linear')
 
-        unit = 'EUR/MWh'
+def _yearlyMeans(country: str, years: np.ndarray) -> np.ndarray:
+    return np.array([np.nanmean(loadYearlyTariff(int(year), country)[1]) for year in years])
 
-    return electricityTariff, unit
 
+def iterateTariffs(*, country: str,
+                   years=None,  # calendar years [-], e.g., range(2025, 2085)
+                   startYear: int | None = None,  # first year, with lifetime, instead of years
+                   lifetime=None,  # number of years [-] or pint quantity, e.g., Q_(60, 'year')
+                   timeStep: float = 1.,  # [h]
+                   window: float | None = None,  # chunk length [h]; one chunk per year if None
+                   fill: str | None = None,  # None, 'cycle' or 'extrapolate' years without data
+                   ) -> Iterator[TariffChunk]:
+
+    """
+      :param country:                       e.g., 'France'
+    Generator of resampled electricity tariffs over a range of years, one year (or window) at a time,
+    so that memory stays bounded whatever the horizon. Each year is aligned on a regular grid from 1 January.
+    Years without complete data raise a ValueError, unless fill is
+        'cycle':        reuse complete available years in turn
+        'extrapolate':  cycle the profiles, shifted to the linear trend of annual mean tariffs
+    """
+
+    if fill not in [None, 'cycle', 'extrapolate']:
+        raise ValueError("fill must be None, 'cycle' or 'extrapolate'.")
+
+    if years is None:
+        if startYear is None or lifetime is None:
+            raise ValueError('Either years, or startYear and lifetime, must be provided.')
+        lifetime = lifetime.to('year').magnitude if hasattr(lifetime, 'to') else lifetime
+        years = range(startYear, startYear + int(lifetime))
+
+    # Incomplete years (e.g., starting in October or with missing months) are treated as missing
+    pool = completeYears(country)
+    if fill is not None:
+        if len(pool) == 0:
+            raise ValueError(f'No complete year of electricity tariffs in {country}.')
+
+        if fill == 'extrapolate':
+            means = _yearlyMeans(country, pool)
+            slope, intercept = np.polyfit(pool, means, 1) if len(pool) > 1 else (0., means[0])
+
+    steps = None if window is None else max(1, int(round(window / timeStep)))
+
+    for year in years:
+
+        year = int(year)
+        if year in pool:
+            sourceYear = year
+        elif fill is None:
+            raise ValueError(f'Electricity tariff not available (or incomplete) in {country} in {year}.')
+        else:
+            sourceYear = int(pool[(year - pool[0]) % len(pool)])
+
+        values, unit = _alignedYear(year, sourceYear, country, timeStep)
+        if fill == 'extrapolate' and sourceYear != year:
+            values = values + (slope * year + intercept - np.nanmean(values))
+
+        index = pd.date_range(f'{year}-01-01', periods=len(values), freq=f'{timeStep}h')
+        tariff = pd.Series(values, index=index)
+
+        if steps is None:
+            yield TariffChunk(year=year, sourceYear=sourceYear, tariff=tariff, unit=unit)
+        else:
+            for start in range(0, len(tariff), steps):
+                yield TariffChunk(year=year, sourceYear=sourceYear, tariff=tariff.iloc[start:start + steps], unit=unit)
 
-""" Data structures """
 
-# Chemical Engineering Plant Cost Index
+""" Data structures (loaded on first access) """
+
 fileDirectory = os.path.dirname(os.path.realpath(__file__))
-CEPCI = pd.read_csv(filepath_or_buffer=fileDirectory + '/CEPCI/CEPCI.csv',
-                    index_col=0,
-                    header=None).squeeze('columns')
-
-# Compressed Air Electricity Storage (CAES) data from PNNL
-data = pd.read_csv(filepath_or_buffer=fileDirectory + '/CAES/PNNL.csv', header=[0, 1])
-PNNL_CAES = {}
-for field, unit in data.columns:
-    PNNL_CAES[field] = [float(x[0]) for x in data[field].values] * ureg[unit]
-
-# Gather currency data in a _Currencies object
-_currencyData = pd.read_csv(filepath_or_buffer=fileDirectory + '/Currencies/Currencies.csv', header=0)
-Currencies = _Currencies(USD=float(_currencyData.USD.values[0]),
-                         GBP=float(_currencyData.GBP.values[0]),
-                         EUR=float(_currencyData.EUR.values[0]))
\ No newline at end of file
+
+
+@functools.cache
+@timed('data.loadCEPCI')
+def loadCEPCI() -> pd.Series:
+    # Chemical Engineering Plant Cost Index
+    count('fileReads')
+    return pd.read_csv(filepath_or_buffer=fileDirectory + '/CEPCI/CEPCI.csv',
+                       index_col=0,
+                       header=None).squeeze('columns')
+
+
+@functools.cache
+@timed('data.loadPNNL_CAES')
+def loadPNNL_CAES() -> dict:
+    # Compressed Air Electricity Storage (CAES) data from PNNL
+    from ..config import ureg
+
+    count('fileReads')
+    data = pd.read_csv(filepath_or_buffer=fileDirectory + '/CAES/PNNL.csv', header=[0, 1])
+    PNNL_CAES = {}
+    for field, unit in data.columns:
+        PNNL_CAES[field] = [float(x[0]) for x in data[field].values] * ureg[unit]
+
+    return PNNL_CAES
+
+
+@functools.cache
+@timed('data.loadCurrencies')
+def loadCurrencies() -> _Currencies:
+    # Gather currency data in a _Currencies object
+    count('fileReads')
+    currencyData = pd.read_csv(filepath_or_buffer=fileDirectory + '/Currencies/Currencies.csv', header=0)
+    return _Currencies(USD=float(currencyData.USD.values[0]),
+                       GBP=float(currencyData.GBP.values[0]),
+                       EUR=float(currencyData.EUR.values[0]))
+
+
+_dataStructures = {'CEPCI': loadCEPCI, 'PNNL_CAES': loadPNNL_CAES, 'Currencies': loadCurrencies}
+
+
+def __getattr__(name):
+    if name in _dataStructures:
+        return _dataStructures[name]()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
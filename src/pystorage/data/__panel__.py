@@ -0,0 +1,149 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from .__tariffs__ import _tariffStore
+from ..tools.profiling import timed
+
+""" Multi-country tariff panel
+
+Electricity tariffs of several countries aligned on one regular UTC grid [1 Jan, 1 Jan of the next year) and
+expressed in one currency, as a (time, country) array. Timestamps of every source are normalised here, once:
+
+    interval end labels are shifted to interval starts
+    local times (e.g., CET/CEST) are converted to UTC; the hour repeated when clocks go back is resolved by
+    order of appearance (summer time first) and the hour skipped when clocks go forward is dropped
+    remaining duplicate timestamps are averaged and missing prices dropped
+
+Each country is then resampled with NumPy: linear interpolation onto finer (or equal) time steps, and mean, minimum
+or maximum over the samples of each step onto coarser ones.
+"""
+
+
+@dataclass
+class TariffPanel:
+    time: np.ndarray  # Start of each time step [datetime64[ns], UTC], shape (steps,)
+    countries: tuple  # e.g., ('Ireland', 'UK')
+    values: np.ndarray  # Electricity tariffs [unit], shape (steps, countries); NaN outside the data of a country
+    unit: str  # e.g., 'USD/MWh'
+    timeStep: float  # [h]
+
+    def __getitem__(self, country: str) -> np.ndarray:
+        return self.values[:, self.countries.index(country)]
+
+    def toDataFrame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, index=pd.DatetimeIndex(self.time).tz_localize('UTC'),
+                            columns=list(self.countries))
+
+
+_AGGREGATIONS = {'mean': np.add, 'min': np.minimum, 'max': np.maximum}
+
+
+def _utcSamples(country: str, year: int) -> tuple[np.ndarray, np.ndarray, str, int]:
+
+    # Samples around the UTC year (with a margin for time zone offsets and interpolation at both ends)
+    store = _tariffStore(country)
+    margin = np.timedelta64(2, 'D')
+    lower, upper = np.searchsorted(store.time, [np.datetime64(f'{year}-01-01', 'ns') - margin,
+                                                np.datetime64(f'{year + 1}-01-01', 'ns') + margin])
+    time = np.asarray(store.time[lower:upper])
+    price = np.asarray(store.price[lower:upper], dtype=np.float64)
+    if len(time) < 2:
+        raise ValueError(f'Electricity tariff not available in {country} in {year}.')
+
+    # Native time step [ns]
+    step = int(np.median(np.diff(time.view(np.int64))))
+
+    if store.label == 'end':
+        time = time - np.timedelta64(step, 'ns')
+
+    keep = np.isfinite(price)
+    if store.timezone != 'UTC':
+        local = pd.DatetimeIndex(time)
+        utc = local.tz_localize(store.timezone, ambiguous=~local.duplicated(keep='first'), nonexistent='NaT')
+        utc = utc.tz_convert('UTC').tz_localize(None)
+        keep &= ~utc.isna()
+        time = utc.values
+
+    time = time[keep].view(np.int64)
+    price = price[keep]
+
+    # Sorted unique timestamps, duplicates averaged
+    time, inverse, counts = np.unique(time, return_inverse=True, return_counts=True)
+    if len(time) < len(price):
+        price = np.bincount(inverse, weights=price) / counts
+    if len(time) == 0:
+        raise ValueError(f'Electricity tariff not available in {country} in {year}.')
+
+    return time, price, store.unit, step
+
+
+def _resample(time: np.ndarray, price: np.ndarray, nativeStep: int, grid: np.ndarray, step: int,
+              aggregation: str) -> np.ndarray:
+
+    """
+      :param time:                          sorted unique sample times [ns]
+      :param nativeStep:                    time step of the samples [ns]
+      :param grid:                          start of each target time step [ns]
+      :param step:                          target time step [ns]
+    """
+
+    if step <= nativeStep:
+        values = np.interp(grid, time, price)
+    else:
+        bins = (time - grid[0]) // step
+        inside = (bins >= 0) & (bins < len(grid))
+        bins, samples = bins[inside], price[inside]
+
+        values = np.full(len(grid), np.nan)
+        if len(bins):
+            starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+            reduced = _AGGREGATIONS[aggregation].reduceat(samples, starts)
+            if aggregation == 'mean':
+                reduced = reduced / np.diff(np.r_[starts, len(samples)])
+            values[bins[starts]] = reduced
+
+            # Steps without samples (gaps in the data): interpolated between neighbouring steps
+            filled = np.flatnonzero(np.isfinite(values))
+            values = np.interp(np.arange(len(grid)), filled, values[filled])
+
+    # Outside the data of the country
+    values[(grid + step <= time[0]) | (grid >= time[-1] + nativeStep)] = np.nan
+
+    return values
+
+
+@timed('data.loadTariffPanel')
+def loadTariffPanel(countries, year: int, *,
+                    timeStep: float = 1.,  # [h]
+                    currency: str | None = None,  # e.g., 'EUR'; selected currency (pystorage.config) if None
+                    aggregation: str = 'mean',  # 'mean', 'min' or 'max' over the samples of coarser time steps
+                    ) -> TariffPanel:
+
+    """
+      :param countries:                     e.g., ['Ireland', 'UK'] (or a single country)
+      :param year:                          year [-], on the UTC calendar
+    Electricity tariffs of several countries on one regular UTC grid, in currency/MWh, shape (steps, countries).
+    """
+
+    from ..config import getConfiguration, conversionFactor
+
+    if aggregation not in _AGGREGATIONS:
+        raise ValueError("aggregation must be 'mean', 'min' or 'max'.")
+    if timeStep <= 0:
+        raise ValueError('The time step must be positive.')
+
+    countries = (countries,) if isinstance(countries, str) else tuple(countries)
+    unit = f'{currency or getConfiguration().currency}/MWh'
+
+    step = int(round(timeStep * 3600e9))
+    grid = np.arange(np.datetime64(f'{year}-01-01', 'ns').view(np.int64),
+                     np.datetime64(f'{year + 1}-01-01', 'ns').view(np.int64), step)
+
+    values = np.empty((len(grid), len(countries)))
+    for k, country in enumerate(countries):
+        time, price, source, nativeStep = _utcSamples(country, year)
+        values[:, k] = _resample(time, price, nativeStep, grid, step, aggregation) * conversionFactor(source, unit)
+
+    return TariffPanel(time=grid.view('datetime64[ns]'), countries=countries, values=values, unit=unit,
+                       timeStep=timeStep)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+from collections.abc import Callable
+from dataclasses import dataclass
+import functools
+import numpy as np
+from ..tools.profiling import timed
+
+""" Data-driven sources
+
+Techno-economic datasets (e.g., PNNL_CAES) are registered with the technology they describe. For each dataset and
+unit system of the design inputs, a single interpolation index is built on first use: one triangulation of the
+(duration, power) points, shared by every cost and performance field, answering vectorised queries for all fields
+at once. Queries outside the convex hull of the data are flagged as extrapolated.
+"""
+
+
+@dataclass(frozen=True)
+class DataSource:
+    name: str  # e.g., 'PNNL_CAES'
+    loader: Callable[[], dict]  # Returns the dataset as a dict of pint arrays (one per field)
+    type: str  # Technology, e.g., 'D-CAES'
+    model: str  # e.g., 'PNNL'
+    referenceYear: int  # Year of the cost data (CEPCI inflation reference) [-]
+    secondarySource: str | None = None  # e.g., 'gas'
+    inputs: tuple = ('duration', 'power')  # Fields spanning the design space
+    generation: int = 0  # Registration number (a new one each time a source is registered) [-]
+
+
+_dataSources: dict[str, DataSource] = {}
+_generation = 0  # Number of registrations, e.g., to invalidate results computed from replaced data
+
+
+def registerDataSource(name: str, loader: Callable[[], dict], *,
+                       type: str,
+                       model: str,
+                       referenceYear: int,
+                       secondarySource: str | None = None,
+                       inputs: tuple = ('duration', 'power')) -> DataSource:
+
+    """
+      :param name:                          e.g., 'PNNL_CAES'
+      :param loader:                        function returning the dataset as a dict of pint arrays
+      :param type:                          technology, e.g., 'D-CAES'
+      :param model:                         e.g., 'PNNL'
+      :param referenceYear:                 year of the cost data [-]
+      :param secondarySource:               secondary fuel used upon discharge (optional)
+      :param inputs:                        fields spanning the design space (discharge duration & power)
+    Register a dataset usable as DataDrivenElectricityStorageTechnology().withInputs(dataSource=name).
+    """
+
+    global _generation
+
+    _generation += 1
+    source = DataSource(name=name, loader=loader, type=type, model=model, referenceYear=referenceYear,
+                        secondarySource=secondarySource, inputs=tuple(inputs), generation=_generation)
+    _dataSources[name] = source
+    interpolationIndex.cache_clear()
+
+    return source
+
+
+def dataSource(name: str) -> DataSource:
+    if name not in _dataSources:
+        raise ValueError(f'No data available for {name}')
+    return _dataSources[name]
+
+
+def availableDataSources() -> list[str]:
+    return sorted(_dataSources)
+
+
+""" Interpolation index """
+
+
+class InterpolationIndex:
+
+    """
+    Piecewise-linear interpolation of every field of a dataset over one Delaunay triangulation of its inputs.
+    Field values are kept in the units of the dataset (see InterpolationIndex.units).
+    """
+
+    def __init__(self, points: np.ndarray, values: np.ndarray, fields: tuple, units: dict):
+
+        from scipy.interpolate import LinearNDInterpolator, NearestNDInterpolator
+
+        self.fields = fields
+        self.units = units
+        self._linear = LinearNDInterpolator(points, values)
+        self._nearest = NearestNDInterpolator(points, values)
+        self._triangulation = self._linear.tri
+
+    def __call__(self, *coordinates, extrapolation: str = 'nan') -> tuple[np.ndarray, np.ndarray]:
+
+        """
+          :param coordinates:                   design inputs (e.g., duration, power), broadcast together
+          :param extrapolation:                 'nan', 'nearest' (data point) or 'raise' outside the data
+        Return field values, shape (..., fields), and the extrapolation flags, shape (...).
+        """
+
+        if extrapolation not in ['nan', 'nearest', 'raise']:
+            raise ValueError("extrapolation must be 'nan', 'nearest' or 'raise'.")
+
+        coordinates = np.broadcast_arrays(*[np.asarray(x, dtype=np.float64) for x in coordinates])
+        shape = coordinates[0].shape
+        points = np.stack([x.ravel() for x in coordinates], axis=-1)
+
+        extrapolated = self._triangulation.find_simplex(points) < 0
+        if extrapolation == 'raise' and extrapolated.any():
+            raise ValueError(f'{int(extrapolated.sum())} design(s) outside the range of the data.')
+
+        values = self._linear(points)
+        if extrapolation == 'nearest' and extrapolated.any():
+            values[extrapolated] = self._nearest(points[extrapolated])
+
+        return values.reshape(shape + (len(self.fields),)), extrapolated.reshape(shape)
+
+    def field(self, name: str) -> int:
+        return self.fields.index(name)
+
+
+@functools.lru_cache(maxsize=None)
+@timed('data.interpolationIndex')
+def interpolationIndex(name: str, inputUnits: tuple | None = None) -> InterpolationIndex:
+
+    """
+      :param name:                          registered data source, e.g., 'PNNL_CAES'
+      :param inputUnits:                    units of the design inputs, e.g., ('hour', 'kW'); dataset units if None
+    Built once per data source and input units, then shared by every model and batch evaluation.
+    """
+
+    source = dataSource(name)
+    data = source.loader()
+
+    inputUnits = inputUnits or tuple(f'{data[key].units}' for key in source.inputs)
+    points = np.column_stack([data[key].to(unit).magnitude for key, unit in zip(source.inputs, inputUnits)])
+
+    fields = tuple(key for key in data if key not in source.inputs)
+    values = np.column_stack([np.asarray(data[key].magnitude, dtype=np.float64) for key in fields])
+    units = {key: f'{data[key].units}' for key in fields}
+
+    return InterpolationIndex(points, values, fields, units)
+
+
+def _loadPNNL_CAES() -> dict:
+    from .__methods__ import loadPNNL_CAES
+    return loadPNNL_CAES()
+
+
+registerDataSource('PNNL_CAES', _loadPNNL_CAES, type='D-CAES', model='PNNL', referenceYear=2023,
+                   secondarySource='gas')
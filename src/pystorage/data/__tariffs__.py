@@ -0,0 +1,225 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import json
+import os
+import numpy as np
+import pandas as pd
+from ..tools.profiling import timed, count
+
+""" Binary tariff store
+
+Each country CSV in data/electricityTariffs is converted once into a columnar store made of
+memory-mappable .npy files (timestamps and prices) and a per-year offset index:
+
+    <cache>/<country>/time.npy   datetime64[ns], sorted chronologically
+    <cache>/<country>/price.npy  float64
+    <cache>/<country>/index.npy  int64 rows of [year, start, stop]
+    <cache>/<country>/meta.json  unit, time zone & timestamp label of the source, format version and signature
+                                 (size, mtime) of the source CSV
+
+The store is rebuilt from the CSV whenever the source signature changes. The cache location defaults to the
+per-user cache directory, $XDG_CACHE_HOME/pystorage (~/.cache/pystorage if unset), rather than the installed package,
+and can be moved with the PYSTORAGE_CACHE_DIR environment variable. If it cannot be written, the parsed arrays are
+kept in memory for the lifetime of the process.
+"""
+
+_FORMAT_VERSION = 2
+_TARIFF_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'electricityTariffs')
+
+
+@dataclass
+class _TariffStore:
+    time: np.ndarray  # Timestamps [datetime64[ns]]
+    price: np.ndarray  # Day-ahead prices [unit]
+    index: np.ndarray  # Per-year offsets [year, start, stop]
+    unit: str  # e.g., 'EUR/MWh'
+    signature: list  # [size, mtime_ns] of the source CSV
+    timezone: str = 'UTC'  # Time zone of the timestamps, e.g., 'Europe/Brussels' (CET/CEST)
+    label: str = 'start'  # Timestamps mark the 'start' or the 'end' of each interval
+
+
+_stores: dict[str, _TariffStore] = {}
+
+
+""" Paths & signatures """
+
+
+def cacheDirectory() -> str:
+
+    if os.environ.get('PYSTORAGE_CACHE_DIR'):
+        return os.environ['PYSTORAGE_CACHE_DIR']
+
+    # XDG base directories: only absolute paths are valid
+    base = os.environ.get('XDG_CACHE_HOME', '')
+    if not os.path.isabs(base):
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pystorage')
+
+
+def _sourcePath(country: str) -> str:
+    return os.path.join(_TARIFF_DIRECTORY, country + '.csv')
+
+
+def _sourceSignature(country: str) -> list:
+    try:
+        status = os.stat(_sourcePath(country))
+    except FileNotFoundError:
+        raise ValueError(f'No electricity tariff data available for {country}.') from None
+    return [status.st_size, status.st_mtime_ns]
+
+
+def availableCountries() -> list[str]:
+    return sorted(file[:-4] for file in os.listdir(_TARIFF_DIRECTORY) if file.endswith('.csv'))
+
+
+""" CSV conversion """
+
+
+@timed('data.parseTariffCSV')
+def _parseCSV(country: str) -> tuple[np.ndarray, np.ndarray, str, str, str]:
+
+    path = _sourcePath(country)
+    count('fileReads', 2)  # Header, then columns
+    header = pd.read_csv(path, nrows=0).columns
+
+    if 'MTU (CET/CEST)' in header:  # ENTSO-E export, e.g., UK
+        df = pd.read_csv(path, usecols=[0, 1])
+        # Intervals read "01.01.2020 00:00 - 01.01.2020 01:00", time-stamped at the end of the interval
+        time = pd.to_datetime(df.iloc[:, 0].str.split(' - ').str[1], format="%d.%m.%Y %H:%M")
+        price = df.iloc[:, 1]
+        unit, timezone, label = 'GBP/MWh', 'Europe/Brussels', 'end'
+    else:  # Ember export
+        df = pd.read_csv(path, usecols=['Datetime (UTC)', 'Price (EUR/MWhe)'])
+        time = pd.to_datetime(df['Datetime (UTC)'], format="%Y-%m-%d %H:%M:%S")
+        price = df['Price (EUR/MWhe)']
+        unit, timezone, label = 'EUR/MWh', 'UTC', 'start'
+
+    time = time.values.astype('datetime64[ns]')
+    price = price.values.astype(np.float64)
+
+    # Keep file order for equal timestamps (e.g., repeated hour when clocks go back)
+    order = np.argsort(time, kind='stable')
+    return time[order], price[order], unit, timezone, label
+
+
+def _yearIndex(time: np.ndarray) -> np.ndarray:
+
+    years = time.astype('datetime64[Y]').astype(np.int64) + 1970
+    starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+    stops = np.r_[starts[1:], len(years)]
+
+    return np.column_stack([years[starts], starts, stops]).astype(np.int64)
+
+
+def _writeStore(directory: str, store: _TariffStore):
+
+    os.makedirs(directory, exist_ok=True)
+
+    # Write each file atomically; the metadata is written last and validates the whole store
+    for name in ['time', 'price', 'index']:
+        temporary = os.path.join(directory, f'{name}.{os.getpid()}.tmp.npy')
+        np.save(temporary, getattr(store, name))
+        os.replace(temporary, os.path.join(directory, name + '.npy'))
+
+    meta = {'version': _FORMAT_VERSION, 'unit': store.unit, 'timezone': store.timezone, 'label': store.label,
+            'signature': store.signature}
+    temporary = os.path.join(directory, f'meta.{os.getpid()}.tmp.json')
+    with open(temporary, 'w') as f:
+        json.dump(meta, f)
+    os.replace(temporary, os.path.join(directory, 'meta.json'))
+
+
+def _readStore(directory: str, signature: list) -> _TariffStore | None:
+
+    try:
+        count('fileReads')
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if meta.get('version') != _FORMAT_VERSION or meta.get('signature') != signature:
+        return None
+
+    count('fileReads', 3)
+    try:
+        return _TariffStore(time=np.load(os.path.join(directory, 'time.npy'), mmap_mode='r'),
+                            price=np.load(os.path.join(directory, 'price.npy'), mmap_mode='r'),
+                            index=np.load(os.path.join(directory, 'index.npy')),
+                            unit=meta['unit'],
+                            signature=signature,
+                            timezone=meta['timezone'],
+                            label=meta['label'])
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
+
+
+def _convert(country: str, signature: list) -> _TariffStore:
+
+    time, price, unit, timezone, label = _parseCSV(country)
+    store = _TariffStore(time=time, price=price, index=_yearIndex(time), unit=unit, signature=signature,
+                         timezone=timezone, label=label)
+
+    directory = os.path.join(cacheDirectory(), country)
+    try:
+        _writeStore(directory, store)
+    except OSError:
+        return store  # Read-only location: keep the parsed arrays in memory
+
+    return _readStore(directory, signature) or store
+
+
+""" Public methods """
+
+
+def buildTariffCache(country: str | None = None) -> list[str]:
+
+    """
+      :param country:                       e.g., 'France'; all bundled countries if None
+    Convert electricity tariff CSV files into the binary store (only if missing or stale).
+    """
+
+    countries = availableCountries() if country is None else [country]
+    for name in countries:
+        _tariffStore(name)
+
+    return countries
+
+
+def _tariffStore(country: str) -> _TariffStore:
+
+    signature = _sourceSignature(country)
+
+    store = _stores.get(country)
+    if store is None or store.signature != signature:
+        store = _readStore(os.path.join(cacheDirectory(), country), signature)
+        if store is None:
+            store = _convert(country, signature)
+        _stores[country] = store
+
+    return store
+
+
+def availableYears(country: str) -> np.ndarray:
+
+    # Years with at least two time steps (e.g., the end of the last interval of a year is not one)
+    index = _tariffStore(country).index
+    return index[index[:, 2] - index[:, 1] > 1, 0]
+
+
+@timed('data.loadYearlyTariff')
+def loadYearlyTariff(year: int, country: str) -> tuple[np.ndarray, np.ndarray, str]:
+
+    """
+      :param year:                          year [-]
+      :param country:                       e.g., 'France'
+    Return read-only (zero-copy) views on the timestamps and prices of a given year, and the price unit.
+    """
+
+    store = _tariffStore(country)
+    rows = np.flatnonzero(store.index[:, 0] == year)
+    if len(rows) == 0:
+        return store.time[:0], store.price[:0], store.unit
+
+    _, start, stop = store.index[rows[0]]
+    return store.time[start:stop], store.price[start:stop], store.unit
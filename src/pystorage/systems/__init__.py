@@ -1 +1,9 @@
 from .powerToPower import ElectricityStorageTechnology, DataDrivenElectricityStorageTechnology, DiabaticCAES
+from .batchEvaluation import levelisedCostOfStorage as batchLevelisedCostOfStorage, LevelisedCostOfStorageBatch
+from .scenarioSweep import Scenario, scenarioGrid, runSweep
+from .dispatch import DispatchSchedule, optimiseDispatch
+from .monteCarlo import Distribution, uniform, triangular, normal, LevelisedCostOfStorageDistribution, \
+    sampleLevelisedCostOfStorage
+from .resultCache import TechnologyResult, ResultCache, evaluateTechnology, resultKey, datasetVersion, \
+    defaultResultCache
+from .simulation import StateOfChargeSimulation, simulateStateOfCharge
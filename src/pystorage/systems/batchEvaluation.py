@@ -0,0 +1,256 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+
+from ..config import ureg, conversionFactor
+from .powerToPower import ElectricityStorageTechnology, DataDrivenElectricityStorageTechnology
+
+Q_ = ureg.Quantity
+
+""" Data classes """
+
+
+@dataclass
+class LevelisedCostOfStorageBatch:
+    values: Q_  # LCOS array of shape (*grid, len(bounds)) [currency/energy]
+    bounds: tuple  # Labels of the last axis, e.g., ('LB', 'nominal', 'UB')
+    inputs: dict  # Broadcast input magnitudes, in the selected units
+
+    @property
+    def shape(self) -> tuple:
+        return self.values.shape[:-1]
+
+    def sel(self, bound: str) -> Q_:
+        return self.values[..., self.bounds.index(bound)]
+
+    def toDataFrame(self):
+
+        import pandas as pd
+
+        df = pd.DataFrame({key: np.ravel(value) for key, value in self.inputs.items()})
+        for index, bound in enumerate(self.bounds):
+            df[bound] = np.ravel(self.values.magnitude[..., index])
+        df.attrs['unit'] = str(self.values.units)
+
+        return df
+
+
+""" Built-in methods """
+
+
+def _checkPositive(values: dict, message: str = '{} must be positive.'):
+    for key, value in values.items():
+        if value is not None and np.any(value < 0):
+            raise ValueError(message.format(key))
+
+
+def _presentValueFactor(i: np.ndarray, n: np.ndarray) -> np.ndarray:
+
+    # Sum of (1 + i) ** -k for k in [1, n - 1], as in AbstractElectricityStorageTechnology.levelisedCostOfStorage
+    n = np.floor(n) - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = (1 - (1 + i) ** -n) / i
+    return np.where(i == 0, n, factor)
+
+
+def _template(dataSource: str | None):
+
+    # Template object: selected units, CEPCI-adjusted conversion factors and interpolation index (data-driven)
+    if dataSource is None:
+        return ElectricityStorageTechnology()
+    return DataDrivenElectricityStorageTechnology().withInputs(dataSource)
+
+
+# Target of each input: selected units (units key, checked as in withInputs), a given unit, or a plain number ('-')
+_TARGETS = {'dischargeDuration': 'time', 'dischargingPower': 'power', 'chargeDuration': 'time',
+            'chargingPower': 'power', 'roundtripEfficiency': '', 'powerIslandSpecificCost': 'powerSpecificCost',
+            'storeSpecificCost': 'energySpecificCost', 'selfDischargeRate': '1/hour', 'secondaryConsumptionRatio': '-',
+            'electricityPrice': 'energySpecificCost', 'gasPrice': 'energySpecificCost',
+            'hydrogenPrice': 'energySpecificCost', 'cyclesPerYear': '-', 'lifetime': 'year', 'discountRate': '',
+            'standby': '-'}
+
+
+def _inputMagnitude(template, name: str, value) -> np.ndarray | None:
+
+    # Float64 magnitude of an input (ValueError or pint DimensionalityError on invalid units)
+    if value is None:
+        return None
+    if isinstance(value, Q_):
+        target = _TARGETS[name]
+        if target in template.units:
+            value = template.convertQuantity(value, dimension=target).magnitude
+        elif target == '-':
+            value = value.magnitude
+        else:
+            value = template._magnitude(value, target)
+    return np.asarray(value, dtype=np.float64)
+
+
+def _dataDrivenFields(template, dt_out: np.ndarray, W_out: np.ndarray) -> dict:
+
+    # Performance and specific costs (LB, nominal, UB along a trailing axis) interpolated from the data source
+    values, _ = template.interpolationIndex(dt_out, W_out)  # All fields in one query
+    field = {key: values[..., k] * template._fieldFactors[key]
+             for k, key in enumerate(template.interpolationIndex.fields)}
+
+    return {'roundtripEfficiency': field['roundtripEfficiency'] * conversionFactor(template.units['efficiency'], ''),
+            'secondaryConsumptionRatio': field['secondaryConsumptionRatio'],
+            'powerIslandSpecificCost': np.stack([field[key] for key in ['powerIslandSpecificCost_LB',
+                                                                        'powerIslandSpecificCost',
+                                                                        'powerIslandSpecificCost_UB']], -1),
+            'storeSpecificCost': np.stack([field[key] for key in ['storeSpecificCost_LB',
+                                                                  'storeSpecificCost',
+                                                                  'storeSpecificCost_UB']], -1)}
+
+
+def _levelisedCost(units: dict, *, dt_out, W_out, dt_in, W_in, eta, pc, ec, secRatio, C_el, C_sec, r, i, n, f,
+                   standby) -> tuple[np.ndarray, dict]:
+
+    # LCOS magnitudes in the selected units; pc & ec carry a trailing axis (e.g., cost bounds)
+    # Enforce energy balance (one missing parameter is derived from the others)
+    parameters = {'chargingPower': W_in, 'chargeDuration': dt_in, 'roundtripEfficiency': eta}
+    missing = [key for key, value in parameters.items() if value is None]
+    if not missing:
+        if not np.all(np.isclose((W_out * dt_out) / (W_in * dt_in), eta)):
+            raise ValueError("Inconsistent charge/discharge and efficiency values.")
+    elif missing == ['chargeDuration']:
+        dt_in = W_out * dt_out / (eta * W_in)
+    elif missing == ['chargingPower']:
+        W_in = W_out * dt_out / (eta * dt_in)
+    elif missing == ['roundtripEfficiency']:
+        eta = (W_out * dt_out) / (W_in * dt_in)
+    else:
+        raise ValueError(f'Underdetermined design: {" and ".join(missing)} missing.')
+
+    # Cycle durations [time], capped number of cycles per year
+    year = conversionFactor('year', units['time'])
+    hour = conversionFactor('hour', units['time'])
+    dt_work = dt_out + dt_in
+    f = np.minimum(f, np.floor(year / dt_work))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dt_stb = standby * (year / f - dt_work)
+
+    # Energy flows [energy]
+    E_in = W_in * dt_in
+    E_st = E_in * (1 - r) ** (dt_stb / hour)
+    E_out = np.where(E_st > 0, eta * E_st, 0)
+    capacity = W_out * dt_out
+    Q_sec = E_out * secRatio
+
+    # Levelised cost of storage [currency/energy], trailing axis of pc & ec last
+    S = _presentValueFactor(i, n)
+    investmentCost = W_out[..., None] * pc + capacity[..., None] * ec
+    operationalCost = ((E_in * C_el * f + Q_sec * C_sec * f) * S)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        LCOS = (investmentCost + operationalCost) / (E_out * f * S)[..., None]
+
+    return LCOS, {'chargeDuration': dt_in, 'chargingPower': W_in, 'roundtripEfficiency': eta, 'cyclesPerYear': f}
+
+
+def levelisedCostOfStorage(*,
+                           dataSource: str | None = None,  # e.g., 'PNNL_CAES'; technology-agnostic if None
+                           dischargeDuration: Q_,  # nominal discharge duration [s]
+                           dischargingPower: Q_,  # nominal discharging power [W]
+                           chargeDuration: Q_ | None = None,  # nominal charge duration [s]
+                           chargingPower: Q_ | None = None,  # nominal charging power [W]
+                           roundtripEfficiency: Q_ | None = None,  # (x > 0)
+                           powerIslandSpecificCost: Q_ | None = None,  # [$/kW]
+                           storeSpecificCost: Q_ | None = None,  # [$/kWh]
+                           selfDischargeRate: Q_ | None = None,  # [%/h]
+                           secondarySource: str | None = None,  # secondary fuel used upon discharge (optional)
+                           secondaryConsumptionRatio: Q_ | float | None = None,  # upon discharge [kWh_g / kWh_e]
+                           electricityPrice: Q_,  # [$/MWh]
+                           gasPrice: Q_ | None = None,  # [$/MWh]
+                           hydrogenPrice: Q_ | None = None,  # [$/MWh]
+                           cyclesPerYear,  # number of cycles per year [#/year]
+                           lifetime: Q_,  # [years]
+                           discountRate: Q_,
+                           standby=0.,  # non-dimensional standby duration [0 - 1]
+                           ) -> LevelisedCostOfStorageBatch:
+
+    """
+    Vectorised counterpart of ElectricityStorageTechnology / DataDrivenElectricityStorageTechnology
+    .withInputs(...).update(...).levelisedCostOfStorage over broadcastable arrays of inputs.
+    Units are converted (and checked) once per batch, then the calculation runs on float64 arrays.
+    """
+
+    template = _template(dataSource)
+    if dataSource is not None:
+        secondarySource = template.secondarySource
+    units = template.units
+
+    def magnitude(name: str, value) -> np.ndarray | None:
+        return _inputMagnitude(template, name, value)
+
+    # Convert inputs once for the whole batch
+    dt_out = magnitude('dischargeDuration', dischargeDuration)
+    W_out = magnitude('dischargingPower', dischargingPower)
+    dt_in = magnitude('chargeDuration', chargeDuration)
+    W_in = magnitude('chargingPower', chargingPower)
+    eta = magnitude('roundtripEfficiency', roundtripEfficiency)
+    C_el = magnitude('electricityPrice', electricityPrice)
+    C_gas = magnitude('gasPrice', gasPrice)
+    C_h2 = magnitude('hydrogenPrice', hydrogenPrice)
+    r = magnitude('selfDischargeRate', Q_(0, '%/hour') if selfDischargeRate is None else selfDischargeRate)
+    i = magnitude('discountRate', discountRate)
+    n = magnitude('lifetime', lifetime)
+    f = magnitude('cyclesPerYear', cyclesPerYear)
+    standby = magnitude('standby', standby)
+
+    _checkPositive({'dischargeDuration': dt_out, 'dischargingPower': W_out, 'chargeDuration': dt_in,
+                    'chargingPower': W_in, 'Electricity price': C_el, 'Gas price': C_gas,
+                    'Hydrogen price': C_h2, 'CyclesPerYear': f})
+    if np.any((r < 0) | (r > 1)):
+        raise ValueError('Self-discharge rate must lie between 0 and 1')
+    if np.any((i < 0) | (i > 1)):
+        raise ValueError('Discount rate must lie between 0 and 1')
+    if np.any(n < 1):
+        raise ValueError('Lifetime must be an integer greater than 1.')
+    if np.any((standby < 0) | (standby > 1)):
+        raise ValueError('standby rate must lie between 0 and 1')
+
+    # Data-driven performance and specific costs (LB, nominal, UB along a trailing axis)
+    if dataSource is not None:
+        derived = {'roundtripEfficiency': roundtripEfficiency, 'secondaryConsumptionRatio': secondaryConsumptionRatio,
+                   'powerIslandSpecificCost': powerIslandSpecificCost, 'storeSpecificCost': storeSpecificCost}
+        for key, value in derived.items():
+            if value is not None:
+                raise ValueError(f'{key} is derived from {dataSource} data and cannot be set.')
+        dt_out, W_out = np.broadcast_arrays(dt_out, W_out)
+        fields = _dataDrivenFields(template, dt_out, W_out)
+        eta, secRatio = fields['roundtripEfficiency'], fields['secondaryConsumptionRatio']
+        pc, ec = fields['powerIslandSpecificCost'], fields['storeSpecificCost']
+        bounds = ('LB', 'nominal', 'UB')
+    else:
+        if powerIslandSpecificCost is None or storeSpecificCost is None:
+            raise ValueError('powerIslandSpecificCost and storeSpecificCost are required.')
+        secRatio = magnitude('secondaryConsumptionRatio',
+                             0. if secondaryConsumptionRatio is None else secondaryConsumptionRatio)
+        pc = magnitude('powerIslandSpecificCost', powerIslandSpecificCost)[..., None]
+        ec = magnitude('storeSpecificCost', storeSpecificCost)[..., None]
+        _checkPositive({'powerIslandSpecificCost': pc, 'storeSpecificCost': ec})
+        bounds = ('nominal',)
+
+    # Secondary energy source
+    if not secondarySource:
+        C_sec = 0.
+    elif secondarySource == 'gas':
+        C_sec = C_gas
+    elif secondarySource == 'hydrogen':
+        C_sec = C_h2
+    else:
+        raise ValueError('Secondary fuel must be either electricity, gas or hydrogen.')
+    if C_sec is None:
+        raise ValueError(f'A {secondarySource} price is required.')
+
+    LCOS, derived = _levelisedCost(units, dt_out=dt_out, W_out=W_out, dt_in=dt_in, W_in=W_in, eta=eta, pc=pc, ec=ec,
+                                   secRatio=secRatio, C_el=C_el, C_sec=C_sec, r=r, i=i, n=n, f=f, standby=standby)
+    dt_in, W_in, eta, f = (derived[key] for key in ['chargeDuration', 'chargingPower', 'roundtripEfficiency',
+                                                    'cyclesPerYear'])
+
+    inputs = {'dischargeDuration': dt_out, 'dischargingPower': W_out, 'chargeDuration': dt_in, 'chargingPower': W_in,
+              'roundtripEfficiency': eta, 'electricityPrice': C_el, 'cyclesPerYear': f, 'lifetime': n,
+              'discountRate': i, 'standby': standby}
+    inputs = {key: np.broadcast_to(value, LCOS.shape[:-1]) for key, value in inputs.items()}
+
+    return LevelisedCostOfStorageBatch(values=Q_(LCOS, units['energySpecificCost']), bounds=bounds, inputs=inputs)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+
+from .operation import _asArray, _prices, _designs, _perYear, _lcosInputs
+
+""" Data classes """
+
+
+@dataclass
+class DispatchSchedule:
+    charge: np.ndarray  # Grid power drawn upon charge, shape (designs, steps) [MW]
+    discharge: np.ndarray  # Grid power delivered upon discharge, shape (designs, steps) [MW]
+    stateOfCharge: np.ndarray  # Stored energy at the start of each step (and at the end), (designs, steps + 1) [MWh]
+    revenue: np.ndarray  # Arbitrage revenue over the series, shape (designs,) [currency of the tariff]
+    cycles: np.ndarray  # Equivalent full cycles over the series, shape (designs,) [-]
+    cyclesPerYear: np.ndarray  # Equivalent full cycles scaled to a year, shape (designs,) [#/year]
+    chargingPrice: np.ndarray  # Energy-weighted mean price paid upon charge, shape (designs,) [currency/MWh]
+    timeStep: float  # [h]
+
+    def lcosInputs(self, unit: str, design: int = 0) -> dict:
+
+        """
+          :param unit:                          tariff unit, e.g., 'EUR/MWh' from extractAndResampleYearlyData
+          :param design:                        index of the design in the batch
+        Realised operation as update() inputs of a techno-economic model, e.g., ES.update(**schedule.lcosInputs(unit)).
+        """
+
+        return _lcosInputs(self.cyclesPerYear[design], self.chargingPrice[design], unit)
+
+
+""" Built-in methods """
+
+
+def _interpolation(position: np.ndarray, start: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+
+    # Flat indices of the levels below & above fractional positions (rows of levels beginning at start), and weights
+    below = np.floor(position)
+    index = start + below.astype(np.intp)
+    return np.stack([index, index + 1]), np.stack([below + 1 - position, position - below])
+
+
+def optimiseDispatch(tariff, *,
+                     storage=None,  # storage object(s), instead of the design parameters below
+                     power=None,  # nominal discharging power [MW]
+                     duration=None,  # nominal discharge duration [h]
+                     roundtripEfficiency=None,  # [-]
+                     selfDischargeRate=0.,  # [1/h]
+                     chargingPower=None,  # nominal charging power [MW]; discharging power if None
+                     timeStep: float | None = None,  # [h]; inferred from the tariff index if None
+                     resolution: int = 4,  # SOC levels per time step of full-power discharge
+                     initialStateOfCharge: float = 0.,  # [0 - 1]
+                     ) -> DispatchSchedule:
+
+    """
+      :param tariff:                        electricity tariff [currency/MWh], e.g., from extractAndResampleYearlyData
+    Revenue-optimal price arbitrage by backward dynamic programming on a discretised state-of-charge grid,
+    vectorised across designs (batch) and SOC levels. Stored energy follows the conventions of operation.py, as in
+    simulateStateOfCharge: the capacity is the grid energy delivered at nominal power over the discharge duration,
+    round-trip losses are applied upon charge and self-discharge decays the stored energy geometrically. Actions are
+    whole numbers of levels up to the nominal powers, plus a partial last action reaching them exactly. The schedule is
+    then simulated with the stored energy itself: each action is limited to the energy stored (or the headroom).
+    Parameters may be pint quantities or floats in the units above, and broadcast across designs.
+    """
+
+    prices, timeStep = _prices(tariff, timeStep)
+
+    # Designs
+    if storage is not None:
+        design = _designs(storage)
+        power, chargingPower, duration = design['power'], design['chargingPower'], design['duration']
+        roundtripEfficiency, selfDischargeRate = design['roundtripEfficiency'], design['selfDischargeRate']
+    if power is None or duration is None or roundtripEfficiency is None:
+        raise ValueError('power, duration and roundtripEfficiency (or storage) are required.')
+
+    W_out = _asArray(power, 'MW')
+    W_in = W_out if chargingPower is None else _asArray(chargingPower, 'MW')
+    dt_out = _asArray(duration, 'hour')
+    eta = _asArray(roundtripEfficiency, '')
+    r = _asArray(selfDischargeRate, '1/hour')
+    W_out, W_in, dt_out, eta, r = np.broadcast_arrays(W_out, W_in, dt_out, eta, r)
+    if np.any(W_out <= 0) or np.any(W_in <= 0) or np.any(dt_out <= 0) or np.any((eta <= 0) | (eta > 1)):
+        raise ValueError('Powers and durations must be positive and efficiencies lie in ]0, 1].')
+    if not 0 <= initialStateOfCharge <= 1 or np.any((r < 0) | (r >= 1)):
+        raise ValueError('initialStateOfCharge must lie in [0, 1] and selfDischargeRate in [0, 1[.')
+
+    # SOC grids: each design discharges by about `resolution` levels per step at full power, on a common number of
+    # levels (those above the top level of shorter designs are never reached)
+    top = np.ceil(resolution * dt_out / timeStep - 1e-9).astype(int)  # Level when full
+    nLevels = top.max() + 1
+    capacity = W_out * dt_out  # [MWh]
+    dE = capacity / top  # Energy per level [MWh]
+    fOut = W_out * timeStep / dE  # Levels discharged per step at full power
+    fIn = eta * W_in * timeStep / dE  # Levels charged per step at full power
+    kOut, kIn = np.floor(fOut + 1e-9).astype(int), np.floor(fIn + 1e-9).astype(int)
+    if np.any(kIn < 1):
+        raise ValueError('The SOC grid is too coarse to charge: increase resolution.')
+
+    # Actions as level changes (negative: discharge): whole levels up to the nominal powers, then the fractional
+    # remainder as a last partial action, so that the nominal powers are reached exactly
+    nDesigns, nSteps = len(W_out), len(prices)
+    steps = np.tile(np.arange(-kOut.max(), kIn.max() + 1, dtype=np.float64), (nDesigns, 1))
+    valid = (steps >= -kOut[:, None]) & (steps <= kIn[:, None])
+    partial = np.c_[fOut - kOut, fIn - kIn] > 1e-9
+    if partial.any():
+        steps = np.c_[steps, -fOut, fIn]
+        valid = np.c_[valid, partial]
+    nActions = steps.shape[1]
+
+    # Feasibility of each action from each level (designs, actions, levels): power limits & bounds of the SOC grid;
+    # staying idle keeps the value finite above the top level
+    target = np.arange(nLevels) + steps[:, :, None]
+    inside = (target >= -1e-9) & (target <= top[:, None, None] + 1e-9)
+    feasible = (valid[:, :, None] & inside) | (steps == 0)[:, :, None]
+
+    # Cash flow per unit price of each action [MWh]: energy drawn (< 0) or delivered (> 0)
+    cashFlow = np.where(steps > 0, -steps * dE[:, None] / eta[:, None], -steps * dE[:, None])[:, :, None]
+    mask = np.where(feasible, 0., -np.inf)  # Applied after the price, whatever its sign
+
+    # Value of the next step: read on a padded grid viewed as (actions, designs, levels) windows for whole actions,
+    # and interpolated between levels for partial actions. With self-discharge, whole actions land on decayed levels:
+    # the windows then read a second grid holding the value at the decayed levels, interpolated once per step
+    decay = (1 - r) ** timeStep
+    selfDischarge = bool(np.any(decay < 1))
+    nWhole = kOut.max() + kIn.max() + 1
+    padded = np.zeros((nDesigns, nLevels + nWhole - 1))
+    value = padded[:, kOut.max():kOut.max() + nLevels]
+    flat, start = padded.ravel(), np.arange(nDesigns)[:, None] * padded.shape[1] + kOut.max()
+
+    decayed = np.zeros_like(padded) if selfDischarge else padded
+    window = np.lib.stride_tricks.sliding_window_view(decayed, nLevels, axis=1).transpose(1, 0, 2)
+    decayedValue = decayed[:, kOut.max():kOut.max() + nLevels]
+
+    # Positions read by interpolation at every step, gathered at once: the decayed levels (with self-discharge),
+    # then the landing levels of partial actions
+    interpolated, first = slice(nWhole, nActions), int(selfDischarge)
+    positions = np.clip(target[:, interpolated], 0, top[:, None, None]).transpose(1, 0, 2) * decay[:, None]
+    if selfDischarge:
+        positions = np.concatenate([(np.arange(nLevels) * decay[:, None])[None], positions])
+    neighbours, weights = _interpolation(positions, start)
+    interpolation = np.empty(weights.shape)
+
+    policy = np.empty((nSteps, nDesigns, nLevels), dtype=np.int8 if nActions < 128 else np.int16)
+
+    # Backward induction (terminal value: zero), vectorised across designs, actions & levels. The candidates of a
+    # block of steps are kept, laid out as (actions, designs, levels) so that the maximum over actions is taken
+    # across contiguous slabs, and price terms and decisions are computed for the whole block at once
+    cashFlow, mask = cashFlow.transpose(1, 0, 2), np.ascontiguousarray(mask.transpose(1, 0, 2))
+    block = max(1, min(nSteps, 2 ** 18 // (nDesigns * nActions * nLevels)))
+    candidates, gains = np.empty((block, nActions, nDesigns, nLevels)), np.empty((block, nActions, nDesigns, nLevels))
+    wholeCandidates, wholeGains = candidates[:, :nWhole], gains[:, :nWhole]
+    interpolatedCandidates, interpolatedGains = candidates[:, interpolated], gains[:, interpolated]
+    for end in range(nSteps, 0, -block):
+        start = max(end - block, 0)
+        np.multiply(prices[start:end, None, None, None], cashFlow, out=gains[:end - start])
+        gains += mask
+        for t in range(end - start - 1, -1, -1):
+            if positions.size:
+                np.multiply(flat[neighbours], weights, out=interpolation)
+            if selfDischarge:
+                np.add(interpolation[0, 0], interpolation[1, 0], out=decayedValue)
+            np.add(window, wholeGains[t], out=wholeCandidates[t])
+            if nActions > nWhole:
+                np.add(interpolation[0, first:], interpolatedGains[t], out=interpolatedCandidates[t])
+                interpolatedCandidates[t] += interpolation[1, first:]
+            np.maximum.reduce(candidates[t], axis=0, out=value)
+
+        # Decisions: first action reaching the maximum
+        best, decision = candidates[:end - start].max(axis=1), policy[start:end]
+        for action in range(nActions - 1, -1, -1):
+            np.copyto(decision, action, where=candidates[:end - start, action] == best)
+
+    # Forward simulation from the initial state of charge, vectorised across designs and in units of levels: the
+    # action of the nearest level, limited to the energy stored (or the headroom) before self-discharge. The level
+    # changes of the decisions are gathered for a block of steps at once
+    levels = np.empty((nSteps + 1, nDesigns))  # Stored energy at the start of each step [levels]
+    reached = np.empty((nSteps, nDesigns)) if selfDischarge else levels[1:]  # Before self-discharge [levels]
+    levels[0] = initialStateOfCharge * top
+    shift, full = np.arange(nDesigns) * nLevels + 0.5, top.astype(np.float64)  # Levels stay within [0, top]
+    nearest = np.empty(nDesigns)
+    block = max(1, min(nSteps, 2 ** 16 // (nDesigns * nLevels)))
+    for start in range(0, nSteps, block):
+        moves = steps[np.arange(nDesigns)[:, None], policy[start:start + block]].reshape(-1, nDesigns * nLevels)
+        for t in range(start, min(start + block, nSteps)):
+            np.add(levels[t], shift, out=nearest)
+            y = reached[t]
+            np.add(levels[t], moves[t - start][nearest.astype(np.intp)], out=y)
+            np.maximum(y, 0., out=y)
+            np.minimum(y, full, out=y)
+            if selfDischarge:
+                np.multiply(y, decay, out=levels[t + 1])
+    energy = (reached - levels[:-1]).T * dE[:, None]  # Change of stored energy before self-discharge [MWh]
+    stored = levels.T * dE[:, None]
+
+    # Power schedules [MW], revenue & cycles
+    charge = np.where(energy > 0, energy / eta[:, None], 0.) / timeStep
+    discharge = np.where(energy < 0, -energy, 0.) / timeStep
+    revenue = ((discharge - charge) * prices).sum(axis=1) * timeStep
+    cycles = discharge.sum(axis=1) * timeStep / capacity
+    drawn = charge.sum(axis=1)
+    chargingPrice = np.divide((charge * prices).sum(axis=1), drawn, out=np.full(nDesigns, np.nan), where=drawn > 0)
+    cyclesPerYear = _perYear(cycles, nSteps, timeStep)
+
+    return DispatchSchedule(charge=charge, discharge=discharge, stateOfCharge=stored, revenue=revenue,
+                            cycles=cycles, cyclesPerYear=cyclesPerYear, chargingPrice=chargingPrice,
+                            timeStep=timeStep)
@@ -0,0 +1,238 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import functools
+import numpy as np
+
+from ..config import ureg
+from .batchEvaluation import _template, _inputMagnitude, _dataDrivenFields, _levelisedCost
+
+Q_ = ureg.Quantity
+
+""" Data classes """
+
+
+@dataclass(frozen=True)
+class Distribution:
+    kind: str  # 'uniform', 'triangular' or 'normal'
+    parameters: tuple  # Pint quantities or floats, e.g., (low, mode, high)
+
+
+def uniform(low, high) -> Distribution:
+    return Distribution('uniform', (low, high))
+
+
+def triangular(low, mode, high) -> Distribution:
+    return Distribution('triangular', (low, mode, high))
+
+
+def normal(mean, standardDeviation) -> Distribution:
+    return Distribution('normal', (mean, standardDeviation))
+
+
+@dataclass
+class LevelisedCostOfStorageDistribution:
+    samples: int  # Number of finite LCOS samples
+    invalid: int  # Number of non-finite LCOS samples (e.g., no electricity recovered) or out-of-domain inputs
+    mean: float  # [unit]
+    standardDeviation: float  # [unit]
+    minimum: float  # [unit]
+    maximum: float  # [unit]
+    histogram: np.ndarray  # Counts per bin, with underflow & overflow counts first & last
+    edges: np.ndarray  # Bin edges [unit]
+    unit: str  # e.g., 'USD/kWh'
+
+    def quantile(self, probability):
+
+        """
+          :param probability:                   in [0, 1], scalar or array
+        Quantile estimated from the streaming histogram (linear within bins, exact at the minimum & maximum).
+        """
+
+        edges = np.clip(np.r_[self.minimum, self.edges, self.maximum], self.minimum, self.maximum)
+        cumulative = np.r_[0, np.cumsum(self.histogram)] / max(self.samples, 1)
+        return np.interp(probability, cumulative, edges)
+
+    @property
+    def quantiles(self) -> dict:
+        return {p: float(self.quantile(p)) for p in [0.05, 0.25, 0.5, 0.75, 0.95]}
+
+
+""" Sampling """
+
+# Inputs derived from the data source (unless given as distributions)
+_DERIVED = ['roundtripEfficiency', 'secondaryConsumptionRatio', 'powerIslandSpecificCost', 'storeSpecificCost']
+
+# Physical domain of sampled inputs (magnitudes): lower bound, upper bound, lower bound included
+_DOMAIN = {'dischargeDuration': (0., np.inf, False), 'dischargingPower': (0., np.inf, False),
+           'chargeDuration': (0., np.inf, False), 'chargingPower': (0., np.inf, False),
+           'roundtripEfficiency': (0., 1., False), 'secondaryConsumptionRatio': (0., np.inf, True),
+           'powerIslandSpecificCost': (0., np.inf, True), 'storeSpecificCost': (0., np.inf, True),
+           'selfDischargeRate': (0., 1., True), 'electricityPrice': (0., np.inf, True),
+           'gasPrice': (0., np.inf, True), 'hydrogenPrice': (0., np.inf, True), 'cyclesPerYear': (0., np.inf, False),
+           'lifetime': (0., np.inf, False), 'discountRate': (0., np.inf, True), 'standby': (0., 1., True)}
+
+
+def _inDomain(name: str, values: np.ndarray) -> np.ndarray:
+    low, high, closed = _DOMAIN[name]
+    return ((values >= low) if closed else (values > low)) & (values <= high)
+
+
+def _draw(rng: np.random.Generator, kind: str, parameters: tuple, size: int) -> np.ndarray:
+
+    if kind == 'uniform':
+        return rng.uniform(*parameters, size=size)
+    if kind == 'triangular':
+        low, mode, high = parameters
+        if np.all(low == high):
+            return np.full(size, low, dtype=np.float64)
+        return rng.triangular(low, mode, high, size=size)
+    if kind == 'normal':
+        return rng.normal(*parameters, size=size)
+    raise ValueError(f'Unknown distribution: {kind}')
+
+
+def _sampleChunk(plan: dict, chunk: int) -> np.ndarray:
+
+    # Independent stream per chunk: results do not depend on the number of workers
+    rng = np.random.default_rng(np.random.SeedSequence(plan['seed'], spawn_key=(chunk,)))
+    size = min(plan['chunkSize'], plan['samples'] - chunk * plan['chunkSize'])
+
+    values = dict(plan['fixed'])
+    for name in sorted(plan['random']):
+        kind, parameters = plan['random'][name]
+        values[name] = _draw(rng, kind, parameters, size)
+
+    # Cost uncertainty of data-driven designs: triangular distributions over the (LB, nominal, UB) bounds
+    for name, bounds in plan['bounds'].items():
+        values[name] = _draw(rng, 'triangular', bounds, size)
+
+    # Samples outside the physical domain (e.g., negative discount rates or prices drawn from normal distributions)
+    valid = np.ones(size, dtype=bool)
+    for name in list(plan['random']) + list(plan['bounds']):
+        valid &= _inDomain(name, values[name])
+
+    C_sec = {None: 0., 'gas': values.get('gasPrice'),
+             'hydrogen': values.get('hydrogenPrice')}[plan['secondarySource']]
+    LCOS, _ = _levelisedCost(
+        plan['units'],
+        dt_out=values['dischargeDuration'], W_out=values['dischargingPower'],
+        dt_in=values.get('chargeDuration'), W_in=values.get('chargingPower'),
+        eta=values.get('roundtripEfficiency'),
+        pc=values['powerIslandSpecificCost'][..., None], ec=values['storeSpecificCost'][..., None],
+        secRatio=values.get('secondaryConsumptionRatio', 0.), C_el=values['electricityPrice'], C_sec=C_sec,
+        r=values.get('selfDischargeRate', 0.), i=values['discountRate'], n=values['lifetime'],
+        f=values['cyclesPerYear'], standby=values.get('standby', 0.))
+
+    return np.where(valid, np.broadcast_to(LCOS[..., 0], (size,)), np.nan)  # Invalid samples: not finite
+
+
+def _chunkStatistics(plan: dict, edges: np.ndarray, chunk: int) -> tuple:
+
+    LCOS = _sampleChunk(plan, chunk)
+    finite = LCOS[np.isfinite(LCOS)]
+    if len(finite) == 0:
+        return 0, len(LCOS), 0., 0., np.inf, -np.inf, np.zeros(len(edges) + 1, dtype=np.int64)
+
+    # Bin counts, with underflow & overflow
+    bins = len(edges) - 1
+    index = np.floor((finite - edges[0]) * (bins / (edges[-1] - edges[0]))) + 1  # Evenly spaced edges
+    counts = np.bincount(np.clip(index, 0, bins + 1).astype(np.intp), minlength=bins + 2)
+    mean = finite.mean()
+    return (len(finite), len(LCOS) - len(finite), mean, ((finite - mean) ** 2).sum(), finite.min(), finite.max(),
+            counts)
+
+
+def sampleLevelisedCostOfStorage(*,
+                                 samples: int = 10 ** 6,
+                                 chunkSize: int = 2 ** 16,  # samples drawn & evaluated at once
+                                 seed: int = 0,
+                                 workers: int = 1,  # number of processes (serial if <= 1)
+                                 bins: int = 4096,  # histogram resolution (quantile accuracy)
+                                 dataSource: str | None = None,  # e.g., 'PNNL_CAES'; technology-agnostic if None
+                                 **inputs) -> LevelisedCostOfStorageDistribution:
+
+    """
+      :param inputs:                        levelisedCostOfStorage inputs (batchEvaluation), fixed or Distribution
+    Monte Carlo distribution of the levelised cost of storage of a design. Samples are drawn and evaluated in chunks;
+    only streaming statistics (moments, extrema, histogram) are kept, so memory does not grow with samples.
+    Each chunk uses its own random stream derived from seed, so results (for a given seed & chunkSize) are
+    reproducible whatever the number of workers. For data-driven designs, specific costs follow triangular
+    distributions over the data bounds (LB, nominal, UB), unless given as distributions. Samples outside the physical
+    domain of an input (e.g., a negative price drawn from a normal distribution) are counted as invalid.
+    """
+
+    template = _template(dataSource)
+
+    secondarySource = inputs.pop('secondarySource', None)
+
+    fixed, random, bounds = {}, {}, {}
+    for name, value in inputs.items():
+        if isinstance(value, Distribution):
+            random[name] = (value.kind, tuple(_inputMagnitude(template, name, parameter)
+                                              for parameter in value.parameters))
+        elif value is not None:
+            fixed[name] = _inputMagnitude(template, name, value)
+
+    if dataSource is not None:
+        if 'dischargeDuration' in random or 'dischargingPower' in random:
+            raise ValueError('The design (duration & power) of a data-driven technology must be fixed.')
+        fields = _dataDrivenFields(template, fixed['dischargeDuration'], fixed['dischargingPower'])
+        for name in _DERIVED:
+            if name in random or name in fixed:
+                continue
+            if name in ['powerIslandSpecificCost', 'storeSpecificCost']:
+                bounds[name] = tuple(fields[name])
+            else:
+                fixed[name] = fields[name]
+        secondarySource = template.secondarySource
+
+    for name in ['dischargeDuration', 'dischargingPower', 'powerIslandSpecificCost', 'storeSpecificCost',
+                 'electricityPrice', 'cyclesPerYear', 'lifetime', 'discountRate']:
+        if name not in fixed and name not in random and name not in bounds:
+            raise ValueError(f'{name} is required.')
+
+    plan = {'seed': seed, 'samples': samples, 'chunkSize': chunkSize, 'fixed': fixed, 'random': random,
+            'bounds': bounds, 'units': template.units, 'secondarySource': secondarySource}
+    chunks = range(-(-samples // chunkSize))
+
+    # Histogram range from a pilot chunk (the first chunk, hence deterministic)
+    pilot = _sampleChunk(plan, 0)
+    pilot = pilot[np.isfinite(pilot)]
+    low, high = (pilot.min(), pilot.max()) if len(pilot) else (0., 1.)
+    margin = 0.5 * (high - low) or 1.
+    edges = np.linspace(low - margin, high + margin, bins + 1)
+
+    evaluate = functools.partial(_chunkStatistics, plan, edges)
+    if workers <= 1:
+        results = map(evaluate, chunks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(evaluate, chunks)
+
+    # Streaming combination of moments (Chan et al.), in chunk order
+    count, invalid, mean, M2 = 0, 0, 0., 0.
+    minimum, maximum = np.inf, -np.inf
+    histogram = np.zeros(bins + 2, dtype=np.int64)
+    try:
+        for n, nInvalid, chunkMean, chunkM2, chunkMinimum, chunkMaximum, counts in results:
+            invalid += nInvalid
+            if n == 0:
+                continue
+            delta = chunkMean - mean
+            total = count + n
+            mean += delta * n / total
+            M2 += chunkM2 + delta ** 2 * count * n / total
+            count = total
+            minimum, maximum = min(minimum, chunkMinimum), max(maximum, chunkMaximum)
+            histogram += counts
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return LevelisedCostOfStorageDistribution(
+        samples=count, invalid=invalid, mean=float(mean),
+        standardDeviation=float(np.sqrt(M2 / (count - 1))) if count > 1 else 0.,
+        minimum=float(minimum), maximum=float(maximum), histogram=histogram, edges=edges,
+        unit=template.units['energySpecificCost'])
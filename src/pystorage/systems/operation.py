@@ -0,0 +1,74 @@
+from __future__ import annotations
+import numpy as np
+
+from ..config import ureg, toMagnitude
+from .powerToPower import AbstractElectricityStorageTechnology
+
+Q_ = ureg.Quantity
+
+""" Storage conventions of the operation models (optimiseDispatch & simulateStateOfCharge)
+
+Stored energy is expressed as the grid energy it can deliver, i.e., after discharging losses:
+    capacity = W_out * dt_out                   energy delivered at nominal power over the discharge duration [MWh]
+    charge:     stored += eta * P_in * dt       all round-trip losses (eta = eta_in * eta_out) applied upon charge
+    discharge:  stored -= P_out * dt
+    self-discharge: stored *= (1 - r) ** dt     geometric decay over each step, as in the techno-economic models
+Splitting the round-trip efficiency between charge and discharge only rescales the internal stored energy: grid
+powers, revenues and cycles are unchanged.
+"""
+
+""" Built-in methods """
+
+
+def _asArray(value, unit: str) -> np.ndarray:
+    value = toMagnitude(value, unit) if isinstance(value, Q_) else value
+    return np.atleast_1d(np.asarray(value, dtype=np.float64))
+
+
+def _prices(tariff, timeStep: float | None) -> tuple[np.ndarray, float]:
+
+    # Tariff values & time step [h] (inferred from the index of a series)
+    if hasattr(tariff, 'index'):
+        if timeStep is None:
+            timeStep = (tariff.index[1] - tariff.index[0]).total_seconds() / 3600
+        tariff = tariff.values
+    if timeStep is None:
+        raise ValueError('timeStep must be provided with a tariff array.')
+    prices = np.asarray(tariff, dtype=np.float64)
+    if np.isnan(prices).any():
+        raise ValueError('The electricity tariff contains missing values.')
+
+    return prices, timeStep
+
+
+def _chargingPower(ES: AbstractElectricityStorageTechnology) -> float:
+
+    if ES.nominalChargingPower is not None:
+        return toMagnitude(ES.nominalChargingPower, 'MW')
+    if None not in [ES.inputElectricity, ES.nominalChargeDuration]:
+        return toMagnitude(ES.inputElectricity, 'MWh') / toMagnitude(ES.nominalChargeDuration, 'hour')
+    return toMagnitude(ES.nominalDischargingPower, 'MW')
+
+
+def _designs(storage) -> dict:
+
+    storage = [storage] if isinstance(storage, AbstractElectricityStorageTechnology) else list(storage)
+
+    for ES in storage:
+        if None in [ES.nominalDischargingPower, ES.nominalDischargeDuration, ES.nominalRoundTripEfficiency]:
+            raise ValueError('Storage objects must define discharging power, discharge duration and efficiency.')
+
+    return {'power': [toMagnitude(ES.nominalDischargingPower, 'MW') for ES in storage],
+            'chargingPower': [_chargingPower(ES) for ES in storage],
+            'duration': [toMagnitude(ES.nominalDischargeDuration, 'hour') for ES in storage],
+            'roundtripEfficiency': [toMagnitude(ES.nominalRoundTripEfficiency, '') for ES in storage],
+            'selfDischargeRate': [0. if ES.selfDischargeRate is None else
+                                  toMagnitude(ES.selfDischargeRate, '1/hour') for ES in storage]}
+
+
+def _perYear(cycles: np.ndarray, nSteps: int, timeStep: float) -> np.ndarray:
+    return cycles * Q_(1, 'year').to('hour').magnitude / (nSteps * timeStep)
+
+
+def _lcosInputs(cyclesPerYear: float, chargingPrice: float, unit: str) -> dict:
+    return {'cyclesPerYear': int(round(cyclesPerYear)), 'electricityPrice': Q_(float(chargingPrice), unit)}
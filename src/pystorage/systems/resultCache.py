@@ -0,0 +1,362 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+import numpy as np
+
+from ..config import ureg, getConfiguration
+from .. import data as builtInData
+from ..data import __sources__ as sources
+from ..tools.profiling import count
+from .powerToPower import ElectricityStorageTechnology, DataDrivenElectricityStorageTechnology
+
+Q_ = ureg.Quantity
+
+""" Memoised model results
+
+Results of evaluateTechnology are keyed on a canonical hash of
+    the inputs (magnitudes and units, whatever the keyword order or int/float spelling)
+    the scene (country, year) and the selected units
+    the versions of the bundled datasets (size & modification time of every data file), of the registered data
+    sources (registration number) and of the cache format
+and kept in a bounded in-memory LRU tier and, optionally, in an on-disk tier (one JSON file per result, written
+atomically) shared between processes. Editing a data file changes the keys: the data files are checked again on
+every miss, and at most _VERSION_INTERVAL seconds apart otherwise. Registering a data source changes them at once.
+"""
+
+_FORMAT_VERSION = 2
+_VERSION_INTERVAL = 5.  # [s]
+_DATA_DIRECTORY = os.path.dirname(os.path.realpath(builtInData.__file__))
+
+# Outputs kept for each evaluation
+_OUTPUTS = ['levelisedCostOfStorage', 'roundtripEfficiency', 'investmentCost', 'storageCapacity', 'inputElectricity',
+            'outputElectricity', 'electricityPrice']
+
+""" Data classes """
+
+
+@dataclass
+class TechnologyResult:
+    levelisedCostOfStorage: Q_ | None  # [currency/energy]; LB, nominal & UB for data-driven technologies
+    roundtripEfficiency: Q_ | None  # [efficiency]
+    investmentCost: Q_ | None  # [currency]
+    storageCapacity: Q_ | None  # [energy]
+    inputElectricity: Q_ | None  # Per cycle [energy]
+    outputElectricity: Q_ | None  # Per cycle [energy]
+    electricityPrice: Q_ | None  # [currency/energy]
+    extrapolated: bool | None = None  # Data-driven design outside the range of the data
+
+
+def _encodeResult(result: TechnologyResult) -> bytes:
+
+    # JSON of plain magnitudes (numbers or lists) & unit strings, independent of the unit registry
+    encoded = {}
+    for item in fields(result):
+        value = getattr(result, item.name)
+        if isinstance(value, Q_):
+            magnitude = value.magnitude
+            encoded[item.name] = {'magnitude': magnitude.tolist() if isinstance(magnitude, np.ndarray) else
+                                  float(magnitude), 'units': f'{value.units}'}
+        else:
+            encoded[item.name] = None if value is None else bool(value)
+    return json.dumps(encoded).encode()
+
+
+def _decodeResult(payload: bytes) -> TechnologyResult:
+
+    decoded = {}
+    for key, value in json.loads(payload).items():
+        if isinstance(value, dict):
+            magnitude = value['magnitude']
+            value = Q_(np.asarray(magnitude, dtype=np.float64) if isinstance(magnitude, list) else magnitude,
+                       value['units'])
+        decoded[key] = value
+    return TechnologyResult(**decoded)
+
+
+""" Canonical keys """
+
+
+@functools.cache
+def _dataFiles() -> tuple:
+
+    # (path, name relative to the data directory) of every bundled data file
+    files = []
+    for directory, subdirectories, names in os.walk(_DATA_DIRECTORY):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith('__'))
+        files += [(os.path.join(directory, name), os.path.relpath(os.path.join(directory, name), _DATA_DIRECTORY))
+                  for name in sorted(names) if name.endswith('.csv')]
+    return tuple(files)
+
+
+@functools.lru_cache(maxsize=None)
+def _unitName(units) -> str:
+    return f'{units}'
+
+
+_version: tuple[float, int, str] | None = None  # (time of the check [s], data source registrations, version)
+
+
+def datasetVersion(*, refresh: bool = False) -> str:
+
+    """
+      :param refresh:                       check the data files again, rather than within _VERSION_INTERVAL
+    Hash of the signature (size, modification time) of every bundled data file and of the registered data sources.
+    """
+
+    global _version
+
+    now, generation = time.monotonic(), sources._generation
+    if not refresh and _version is not None and now - _version[0] < _VERSION_INTERVAL and _version[1] == generation:
+        return _version[2]
+
+    hasher = hashlib.sha256()
+    for path, name in _dataFiles():
+        status = os.stat(path)
+        hasher.update(f'{name}:{status.st_size}:{status.st_mtime_ns};'.encode())
+    for name in builtInData.availableDataSources():
+        source = builtInData.dataSource(name)
+        hasher.update(f'{name}:{source.type}:{source.model}:{source.referenceYear}:{source.secondarySource}:'
+                      f'{source.generation};'.encode())
+
+    _version = (now, generation, hasher.hexdigest())
+    return _version[2]
+
+
+def _hashValue(hasher, value):
+
+    # Type-tagged, order-independent encoding
+    if value is None:
+        hasher.update(b'N')
+    elif isinstance(value, bool):
+        hasher.update(b'B1' if value else b'B0')
+    elif isinstance(value, (int, float, np.integer, np.floating)):
+        hasher.update(b'F' + repr(float(value)).encode())
+    elif isinstance(value, str):
+        hasher.update(b'S' + str(len(value)).encode() + b':' + value.encode())
+    elif isinstance(value, Q_):
+        hasher.update(b'Q')
+        _hashValue(hasher, value.magnitude)
+        _hashValue(hasher, _unitName(value._units))
+    elif isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value, dtype=np.float64)
+        hasher.update(b'A' + repr(array.shape).encode())
+        hasher.update(array.tobytes())
+    elif isinstance(value, (list, tuple)):
+        _hashValue(hasher, np.asarray(value, dtype=np.float64))
+    elif isinstance(value, dict):
+        hasher.update(b'D' + str(len(value)).encode())
+        for key in sorted(value):
+            _hashValue(hasher, key)
+            _hashValue(hasher, value[key])
+    else:
+        raise TypeError(f'Cannot derive a cache key from {type(value).__name__}.')
+
+
+def resultKey(dataSource: str | None, inputs: dict, *, refresh: bool = False) -> str:
+
+    """
+      :param dataSource:                    e.g., 'PNNL_CAES'; technology-agnostic if None
+      :param inputs:                        withInputs & update keyword arguments
+      :param refresh:                       check the data files again (see datasetVersion)
+    Canonical key of an evaluation in the current scene & unit system.
+    """
+
+    configuration = getConfiguration()
+    hasher = hashlib.sha256()
+    _hashValue(hasher, {'format': _FORMAT_VERSION,
+                        'data': datasetVersion(refresh=refresh),
+                        'dataSource': dataSource,
+                        'scene': {'country': configuration.country, 'year': configuration.year},
+                        'units': configuration.units,
+                        'compiledUnits': configuration.compiledUnits,
+                        'inputs': {key: value for key, value in inputs.items() if value is not None}})
+
+    return hasher.hexdigest()
+
+
+""" Cache tiers """
+
+
+class ResultCache:
+
+    """
+    In-memory LRU tier bounded in number of entries and bytes (serialised size), and optional on-disk tier
+    (directory shared between processes). Thread-safe.
+    """
+
+    def __init__(self, *,
+                 maxEntries: int = 4096,
+                 maxBytes: int = 64 * 2 ** 20,  # [B]
+                 directory: str | None = None):  # on-disk tier (optional)
+
+        if maxEntries < 0 or maxBytes < 0:
+            raise ValueError('Cache limits must be positive.')
+
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.directory = directory
+        self._entries: OrderedDict[str, tuple[TechnologyResult, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.statistics = {'hits': 0, 'diskHits': 0, 'misses': 0, 'evictions': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _remember(self, key: str, result: TechnologyResult, size: int):
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.maxBytes or self.maxEntries == 0:
+                return
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while len(self._entries) > self.maxEntries or self._bytes > self.maxBytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.statistics['evictions'] += 1
+
+    def get(self, key: str) -> TechnologyResult | None:
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.statistics['hits'] += 1
+                return entry[0]
+
+        if self.directory is not None:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    payload = f.read()
+                count('fileReads')
+                result = _decodeResult(payload)
+            except (FileNotFoundError, ValueError, KeyError, TypeError):
+                pass  # Missing or corrupted file
+            else:
+                self.statistics['diskHits'] += 1
+                self._remember(key, result, len(payload))
+                return result
+
+        self.statistics['misses'] += 1
+        return None
+
+    def put(self, key: str, result: TechnologyResult):
+
+        payload = _encodeResult(result)
+        self._remember(key, result, len(payload))
+
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                with open(temporary, 'wb') as f:
+                    f.write(payload)
+                os.replace(temporary, path)
+            except OSError:
+                pass  # Read-only location: memory tier only
+
+    def clear(self, *, disk: bool = False):
+
+        """
+          :param disk:                          also delete the on-disk tier
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+        if disk and self.directory is not None and os.path.isdir(self.directory):
+            for directory, _, names in os.walk(self.directory):
+                for name in names:
+                    if name.endswith('.json'):
+                        os.remove(os.path.join(directory, name))
+
+
+_defaultCache = ResultCache()
+
+
+def defaultResultCache() -> ResultCache:
+    return _defaultCache
+
+
+""" Memoised evaluation """
+
+# Inputs passed to update() rather than withInputs()
+_PRICES = ['electricityPrice', 'gasPrice', 'hydrogenPrice']
+
+
+def _meanTariff() -> Q_:
+
+    # Mean wholesale electricity price of the scene (country & year), over the hourly resampled year
+    configuration = getConfiguration()
+    tariff, unit = builtInData.extractAndResampleYearlyData(1., configuration.year, configuration.country)
+    return Q_(float(np.nanmean(tariff.values)), unit)
+
+
+def _evaluate(dataSource: str | None, inputs: dict) -> TechnologyResult:
+
+    inputs = dict(inputs)
+    prices = {key: inputs.pop(key) for key in _PRICES if inputs.get(key) is not None}
+    if isinstance(prices.get('electricityPrice'), str):
+        if prices['electricityPrice'] != 'tariff':
+            raise ValueError("electricityPrice must be a quantity or 'tariff'.")
+        prices['electricityPrice'] = _meanTariff()
+
+    if dataSource is None:
+        ES = ElectricityStorageTechnology().withInputs(**inputs)
+    else:
+        ES = DataDrivenElectricityStorageTechnology().withInputs(dataSource=dataSource, **inputs)
+    ES.update(**prices)
+
+    result = TechnologyResult(**{name: getattr(ES, name) for name in _OUTPUTS})
+    if dataSource is not None:
+        result.extrapolated = ES.extrapolated
+
+    return result
+
+
+def evaluateTechnology(dataSource: str | None = None, *,
+                       cache: ResultCache | bool | None = None,  # default cache if None or True; not cached if False
+                       **inputs) -> TechnologyResult:
+
+    """
+      :param dataSource:                    e.g., 'PNNL_CAES'; technology-agnostic if None
+      :param inputs:                        withInputs & update keyword arguments; electricityPrice='tariff' uses the
+                                            mean tariff of the scene (country & year)
+    Memoised evaluation of a storage technology in the current scene & unit system. Results are shared: do not modify.
+    """
+
+    if cache is False:
+        return _evaluate(dataSource, inputs)
+    cache = _defaultCache if cache is None or cache is True else cache
+
+    key = resultKey(dataSource, inputs)
+    result = cache.get(key)
+    if result is None:
+
+        # Data files checked again on a miss: edited data yield a new key
+        refreshed = resultKey(dataSource, inputs, refresh=True)
+        if refreshed != key:
+            key, result = refreshed, cache.get(refreshed)
+
+    if result is None:
+        result = _evaluate(dataSource, inputs)
+        cache.put(key, result)
+
+    return result
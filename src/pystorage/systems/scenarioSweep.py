@@ -0,0 +1,286 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from multiprocessing import shared_memory
+import itertools
+import os
+import sys
+import numpy as np
+
+from ..config import ureg, getConfiguration, scene
+from ..data.__tariffs__ import _tariffStore, availableCountries, availableYears
+from ..data.__methods__ import resampleYearlyData
+from .powerToPower import DataDrivenElectricityStorageTechnology
+
+Q_ = ureg.Quantity
+
+# Inputs passed to update() rather than withInputs()
+_PRICES = ['electricityPrice', 'gasPrice', 'hydrogenPrice']
+
+""" Data classes """
+
+
+@dataclass(frozen=True)
+class Scenario:
+    country: str  # e.g., 'UK'
+    year: int  # year [-]
+    dataSource: str = 'PNNL_CAES'  # data-driven technology
+    inputs: dict = field(default_factory=dict)  # withInputs & update keyword arguments (electricityPrice: mean tariff)
+
+
+""" Scenario generation """
+
+
+def scenarioGrid(*, countries: list | None = None, years: list | None = None, dataSource: str = 'PNNL_CAES',
+                 **inputs) -> list[Scenario]:
+
+    """
+      :param countries:                     e.g., ['UK', 'Ireland']; all bundled countries if None
+      :param years:                         years [-]; all available years (per country) if None
+      :param dataSource:                    e.g., 'PNNL_CAES'
+      :param inputs:                        withInputs / update arguments; lists are swept (Cartesian product)
+    """
+
+    names = list(inputs)
+    values = [value if isinstance(value, list) else [value] for value in inputs.values()]
+
+    scenarios = []
+    for country in (availableCountries() if countries is None else countries):
+        for year in (availableYears(country).tolist() if years is None else years):
+            for combination in itertools.product(*values):
+                scenarios.append(Scenario(country=country, year=int(year), dataSource=dataSource,
+                                          inputs=dict(zip(names, combination))))
+
+    return scenarios
+
+
+""" Shared tariff arrays """
+
+
+def _encode(value):
+    # Quantities are transferred as (magnitude, unit) pairs: workers rebuild them with their own registry
+    return (float(value.magnitude), f'{value.units}') if isinstance(value, Q_) else value
+
+
+def _decode(value):
+    return Q_(*value) if isinstance(value, tuple) else value
+
+
+def _shareTariffs(countries: list) -> tuple[shared_memory.SharedMemory, dict]:
+
+    stores = {country: _tariffStore(country) for country in countries}
+    total = sum(len(store.time) for store in stores.values())
+
+    block = shared_memory.SharedMemory(create=True, size=max(16 * total, 16))
+    time = np.ndarray((total,), dtype='datetime64[ns]', buffer=block.buf)
+    price = np.ndarray((total,), dtype=np.float64, buffer=block.buf, offset=8 * total)
+
+    layout = {}
+    offset = 0
+    for country, store in stores.items():
+        time[offset:offset + len(store.time)] = store.time
+        price[offset:offset + len(store.price)] = store.price
+        layout[country] = {'offset': offset, 'index': store.index.tolist(), 'unit': store.unit}
+        offset += len(store.time)
+
+    return block, {'name': block.name, 'total': total, 'countries': layout}
+
+
+# Worker state, set by _initialiseWorker
+_worker: dict = {}
+
+
+def _bindWorker(block: shared_memory.SharedMemory, descriptor: dict, configuration: dict, timeStep: float,
+                errors: str):
+
+    total = descriptor['total']
+    time = np.ndarray((total,), dtype='datetime64[ns]', buffer=block.buf)
+    price = np.ndarray((total,), dtype=np.float64, buffer=block.buf, offset=8 * total)
+    time.flags.writeable = False
+    price.flags.writeable = False
+
+    _worker.update(block=block, time=time, price=price, layout=descriptor['countries'],
+                   configuration=configuration, timeStep=timeStep, errors=errors)
+
+
+def _initialiseWorker(descriptor: dict, configuration: dict, timeStep: float, errors: str):
+
+    # The parent process owns (and unlinks) the block; workers share its resource tracker
+    if sys.version_info >= (3, 13):
+        block = shared_memory.SharedMemory(name=descriptor['name'], track=False)
+    else:
+        block = shared_memory.SharedMemory(name=descriptor['name'])
+
+    _bindWorker(block, descriptor, configuration, timeStep, errors)
+
+
+def _yearlyTariff(country: str, year: int):
+
+    layout = _worker['layout'][country]
+    for y, start, stop in layout['index']:
+        if y == year:
+            start, stop = layout['offset'] + start, layout['offset'] + stop
+            return _worker['time'][start:stop], _worker['price'][start:stop], layout['unit']
+
+    raise ValueError(f'Electricity tariff not available in {country} in {year}.')
+
+
+def _evaluate(task: tuple) -> dict:
+
+    index, scenario = task
+
+    # Scenario description, then outputs (same columns for every row, including failed scenarios)
+    row = {'scenario': index, 'country': scenario.country, 'year': scenario.year, 'dataSource': scenario.dataSource}
+    for key, value in scenario.inputs.items():
+        if isinstance(value, tuple):
+            row[f'{key} [{value[1]}]'] = value[0]
+        else:
+            row[key] = value
+
+    try:
+        row.update(_evaluateScenario(scenario))
+    except Exception as error:
+        if _worker['errors'] == 'raise':
+            raise
+        row.update({key: np.nan for key in ['meanElectricityPrice', 'roundtripEfficiency',
+                                            'LCOS_LB', 'LCOS', 'LCOS_UB']})
+        row.update(unit='', error=f'{type(error).__name__}: {error}')
+
+    return row
+
+
+def _evaluateScenario(scenario: Scenario) -> dict:
+
+    inputs = {key: _decode(value) for key, value in scenario.inputs.items()}
+    prices = {key: inputs.pop(key) for key in _PRICES if key in inputs}
+
+    with scene(country=scenario.country, year=scenario.year, **_worker['configuration']):
+
+        # Mean wholesale electricity price over the resampled year
+        time, price, unit = _yearlyTariff(scenario.country, scenario.year)
+        tariff = resampleYearlyData(time, price, _worker['timeStep'])
+        prices.setdefault('electricityPrice', Q_(float(np.nanmean(tariff.values)), unit))
+
+        ES = DataDrivenElectricityStorageTechnology().withInputs(dataSource=scenario.dataSource, **inputs)
+        ES.update(**prices)
+        LCOS = ES.levelisedCostOfStorage
+        LCOS = np.full(3, np.nan) if LCOS is None else np.atleast_1d(LCOS.magnitude)
+        efficiency = ES.roundtripEfficiency
+
+        row = {'meanElectricityPrice': ES.electricityPrice.magnitude,
+               'roundtripEfficiency': np.nan if efficiency is None else efficiency.magnitude,
+               'LCOS_LB': LCOS[0], 'LCOS': LCOS[1], 'LCOS_UB': LCOS[2],
+               'unit': ES.units['energySpecificCost']}
+
+    if _worker['errors'] == 'record':
+        row['error'] = ''
+
+    return row
+
+
+""" Sweep runner """
+
+
+class _ParquetSink:
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ImportError('Writing sweep results to Parquet requires pyarrow.') from None
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def runSweep(scenarios: list[Scenario], *,
+             timeStep: float = 1.,  # tariff time step [h]
+             workers: int | None = None,  # number of processes (serial if <= 1)
+             sink: str | None = None,  # Parquet file path; results are returned as a DataFrame if None
+             batchSize: int = 1024,  # rows buffered before being written to the sink
+             errors: str = 'raise',  # 'raise' or 'record' failed scenarios in an 'error' column
+             progress: bool = True):
+
+    """
+    Evaluate data-driven LCOS scenarios over a process pool. Tariff arrays of every country involved are
+    decoded once in the parent and shared read-only with the workers through shared memory.
+    Results keep the order of the scenarios, so reruns are reproducible.
+    """
+
+    if errors not in ['raise', 'record']:
+        raise ValueError("errors must be either 'raise' or 'record'.")
+
+    import pandas as pd
+    from rich.progress import Progress
+
+    scenarios = list(scenarios)
+    tasks = [(index, Scenario(country=scenario.country, year=scenario.year, dataSource=scenario.dataSource,
+                              inputs={key: _encode(value) for key, value in scenario.inputs.items()}))
+             for index, scenario in enumerate(scenarios)]
+
+    configuration = {key: value for key, value in asdict(getConfiguration()).items()
+                     if key not in ['country', 'year']}
+    workers = os.cpu_count() if workers is None else workers
+
+    block, descriptor = _shareTariffs(sorted({scenario.country for scenario in scenarios}))
+    writer = _ParquetSink(sink) if sink is not None else None
+    frames, rows = [], []
+
+    def flush():
+        if rows:
+            if writer is not None:
+                writer.write(pd.DataFrame(rows))
+            else:
+                frames.append(pd.DataFrame(rows))
+            rows.clear()
+
+    try:
+        with Progress(disable=not progress, transient=True) as bar:
+            taskBar = bar.add_task('Scenario sweep', total=len(tasks))
+
+            if workers <= 1:
+                _bindWorker(block, descriptor, configuration, timeStep, errors)
+                results = map(_evaluate, tasks)
+                executor = None
+            else:
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_initialiseWorker,
+                                               initargs=(descriptor, configuration, timeStep, errors))
+                results = executor.map(_evaluate, tasks, chunksize=max(1, len(tasks) // (4 * workers)))
+
+            try:
+                for row in results:
+                    rows.append(row)
+                    bar.advance(taskBar)
+                    if len(rows) >= batchSize:
+                        flush()
+                flush()
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+    finally:
+        if writer is not None:
+            writer.close()
+        _worker.clear()
+        block.close()
+        block.unlink()
+
+    if writer is not None:
+        return sink
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -0,0 +1,182 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+
+from .operation import _asArray, _prices, _designs, _perYear, _lcosInputs
+
+""" Data classes """
+
+
+@dataclass
+class StateOfChargeSimulation:
+    capacity: np.ndarray  # Stored energy when full (grid energy deliverable), shape (configurations,) [MWh]
+    charged: np.ndarray  # Grid energy drawn upon charge, shape (configurations,) [MWh]
+    discharged: np.ndarray  # Grid energy delivered upon discharge, shape (configurations,) [MWh]
+    selfDischarge: np.ndarray  # Stored energy lost to self-discharge, shape (configurations,) [MWh]
+    revenue: np.ndarray  # Arbitrage revenue, shape (configurations,) [currency of the tariff]
+    chargingPrice: np.ndarray  # Energy-weighted mean price paid upon charge, shape (configurations,) [currency/MWh]
+    cycles: np.ndarray  # Equivalent full cycles over the series, shape (configurations,) [-]
+    cyclesPerYear: np.ndarray  # Equivalent full cycles scaled to a year, shape (configurations,) [#/year]
+    minimumStateOfCharge: np.ndarray  # Shape (configurations,) [MWh]
+    maximumStateOfCharge: np.ndarray  # Shape (configurations,) [MWh]
+    finalStateOfCharge: np.ndarray  # Shape (configurations,) [MWh]
+    timeStep: float  # [h]
+    stateOfCharge: np.ndarray | None = None  # Trace at each step start (and at the end), (configs, steps + 1) [MWh]
+    charge: np.ndarray | None = None  # Trace of grid power drawn, shape (configurations, steps) [MW]
+    discharge: np.ndarray | None = None  # Trace of grid power delivered, shape (configurations, steps) [MW]
+
+    def lcosInputs(self, unit: str, configuration: int = 0) -> dict:
+
+        """
+          :param unit:                          tariff unit, e.g., 'EUR/MWh' from extractAndResampleYearlyData
+          :param configuration:                 index of the configuration in the batch
+        Simulated operation as update() inputs of a techno-economic model, e.g., ES.update(**result.lcosInputs(unit)).
+        """
+
+        return _lcosInputs(self.cyclesPerYear[configuration], self.chargingPrice[configuration], unit)
+
+
+""" Built-in methods """
+
+
+def simulateStateOfCharge(tariff, *,
+                          storage=None,  # storage object(s), instead of the design parameters below
+                          power=None,  # nominal discharging power [MW]
+                          duration=None,  # nominal discharge duration [h]
+                          chargingPower=None,  # nominal charging power [MW]; discharging power if None
+                          roundtripEfficiency=None,  # [-]
+                          chargingEfficiency=None,  # [-], with dischargingEfficiency instead of roundtripEfficiency
+                          dischargingEfficiency=None,  # [-], with chargingEfficiency instead of roundtripEfficiency
+                          selfDischargeRate=0.,  # [1/h], see tools.math.convertRate for other time bases
+                          chargeBelow=None,  # charge at full power when the tariff is at or below [currency/MWh]
+                          dischargeAbove=None,  # discharge at full power when the tariff is at or above [currency/MWh]
+                          setpoint=None,  # requested grid power (> 0: charge), (steps,) or (configs, steps) [MW]
+                          initialStateOfCharge=0.,  # [0 - 1]
+                          timeStep: float | None = None,  # [h]; inferred from the tariff index if None
+                          traces: bool = False,  # keep the SOC and power time series
+                          ) -> StateOfChargeSimulation:
+
+    """
+      :param tariff:                        electricity tariff [currency/MWh], e.g., from extractAndResampleYearlyData
+    Step the state of charge of a batch of storage configurations through a tariff time series, vectorised across
+    configurations. Each step, the requested power is limited by the rated power and by the energy (or headroom)
+    available, then the stored energy decays by self-discharge. Stored energy follows the conventions of
+    operation.py, as in optimiseDispatch: the capacity is the grid energy delivered at nominal power over the
+    discharge duration and round-trip losses (charging times discharging efficiency) are applied upon charge.
+    Parameters may be pint quantities or floats in the units above, and broadcast across configurations. Only
+    per-configuration accumulators are kept, unless traces are requested.
+    """
+
+    prices, timeStep = _prices(tariff, timeStep)
+
+    # Configurations
+    if storage is not None:
+        design = _designs(storage)
+        power, chargingPower, duration = design['power'], design['chargingPower'], design['duration']
+        roundtripEfficiency, selfDischargeRate = design['roundtripEfficiency'], design['selfDischargeRate']
+    if power is None or duration is None:
+        raise ValueError('power and duration (or storage) are required.')
+
+    if chargingEfficiency is None and dischargingEfficiency is None:
+        if roundtripEfficiency is None:
+            raise ValueError('roundtripEfficiency, or charging and discharging efficiencies, are required.')
+        eta = _asArray(roundtripEfficiency, '')
+    elif chargingEfficiency is None or dischargingEfficiency is None:
+        raise ValueError('Both charging and discharging efficiencies are required.')
+    else:
+        eta_in, eta_out = _asArray(chargingEfficiency, ''), _asArray(dischargingEfficiency, '')
+        if np.any((eta_in <= 0) | (eta_in > 1)) or np.any((eta_out <= 0) | (eta_out > 1)):
+            raise ValueError('Efficiencies must lie in ]0, 1].')
+        eta = eta_in * eta_out
+
+    W_out = _asArray(power, 'MW')
+    W_in = W_out if chargingPower is None else _asArray(chargingPower, 'MW')
+    dt_out = _asArray(duration, 'hour')
+    r = _asArray(selfDischargeRate, '1/hour')
+    SOC_0 = _asArray(initialStateOfCharge, '')
+
+    # Control: price thresholds or power setpoints
+    if setpoint is not None:
+        setpoint = _asArray(setpoint, 'MW')
+        if setpoint.shape[-1] != len(prices):
+            raise ValueError('The setpoint must have one value per time step.')
+        shape = np.broadcast_shapes(W_out.shape, W_in.shape, dt_out.shape, eta.shape, r.shape,
+                                    SOC_0.shape, setpoint.shape[:-1])
+    elif chargeBelow is not None and dischargeAbove is not None:
+        low, high = (np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in [chargeBelow, dischargeAbove])
+        if np.any(low >= high):
+            raise ValueError('chargeBelow must be lower than dischargeAbove.')
+        shape = np.broadcast_shapes(W_out.shape, W_in.shape, dt_out.shape, eta.shape, r.shape,
+                                    SOC_0.shape, low.shape, high.shape)
+        low, high = np.broadcast_to(low, shape), np.broadcast_to(high, shape)
+    else:
+        raise ValueError('Either chargeBelow and dischargeAbove, or setpoint, are required.')
+
+    W_out, W_in, dt_out, eta, r, SOC_0 = (np.broadcast_to(x, shape).astype(np.float64) for x in
+                                          [W_out, W_in, dt_out, eta, r, SOC_0])
+    if np.any(W_out <= 0) or np.any(W_in <= 0) or np.any(dt_out <= 0) or np.any((eta <= 0) | (eta > 1)):
+        raise ValueError('Powers and durations must be positive and efficiencies lie in ]0, 1].')
+    if np.any((SOC_0 < 0) | (SOC_0 > 1)) or np.any((r < 0) | (r >= 1)):
+        raise ValueError('initialStateOfCharge must lie in [0, 1] and selfDischargeRate in [0, 1[.')
+
+    # Per-step limits [MW] & decay, then state & accumulators of shape (configurations,)
+    capacity = W_out * dt_out  # Grid energy delivered at nominal power over the duration [MWh]
+    headroomRate = 1 / (eta * timeStep)  # Grid power per MWh of headroom
+    decay = (1 - r) ** timeStep
+
+    stored = SOC_0 * capacity
+    charged, discharged, selfDischarge = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+    cost, income = np.zeros(shape), np.zeros(shape)
+    minimum, maximum = stored.copy(), stored.copy()
+    P_in, P_out, before = np.empty(shape), np.empty(shape), np.empty(shape)
+
+    nSteps = len(prices)
+    if traces:
+        stateOfCharge = np.empty(shape + (nSteps + 1,))
+        charge, discharge = np.empty(shape + (nSteps,)), np.empty(shape + (nSteps,))
+        stateOfCharge[..., 0] = stored
+
+    for t in range(nSteps):
+
+        # Requested grid power
+        if setpoint is None:
+            np.multiply(W_in, prices[t] <= low, out=P_in)
+            np.multiply(W_out, prices[t] >= high, out=P_out)
+        else:
+            request = setpoint[..., t]
+            np.minimum(np.maximum(request, 0.), W_in, out=P_in)
+            np.minimum(np.maximum(-request, 0.), W_out, out=P_out)
+
+        # Limited by the headroom & energy stored
+        np.minimum(P_in, (capacity - stored) * headroomRate, out=P_in)
+        np.minimum(P_out, stored / timeStep, out=P_out)
+
+        # Energy balance, then self-discharge over the step
+        stored += (P_in * eta - P_out) * timeStep
+        np.clip(stored, 0., capacity, out=stored)
+        before[:] = stored
+        stored *= decay
+        selfDischarge += before - stored
+
+        charged += P_in
+        discharged += P_out
+        cost += P_in * prices[t]
+        income += P_out * prices[t]
+        np.minimum(minimum, stored, out=minimum)
+        np.maximum(maximum, stored, out=maximum)
+
+        if traces:
+            charge[..., t], discharge[..., t], stateOfCharge[..., t + 1] = P_in, P_out, stored
+
+    charged *= timeStep
+    discharged *= timeStep
+    cycles = discharged / capacity
+    chargingPrice = np.divide(cost * timeStep, charged, out=np.full(shape, np.nan), where=charged > 0)
+
+    return StateOfChargeSimulation(
+        capacity=capacity, charged=charged, discharged=discharged, selfDischarge=selfDischarge,
+        revenue=(income - cost) * timeStep, chargingPrice=chargingPrice, cycles=cycles,
+        cyclesPerYear=_perYear(cycles, nSteps, timeStep),
+        minimumStateOfCharge=minimum, maximumStateOfCharge=maximum, finalStateOfCharge=stored, timeStep=timeStep,
+        stateOfCharge=stateOfCharge if traces else None, charge=charge if traces else None,
+        discharge=discharge if traces else None)
@@ -1 +1,2 @@
 from . import math
+from . import profiling
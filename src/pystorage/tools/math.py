@@ -1,32 +1,136 @@
+from collections import OrderedDict
+import hashlib
+import threading
 import numpy as np
 
 
-def polyfit2d(x, y, z, *, nx=1, ny=1, returnResiduals=False):
+def vandermonde2d(x, y, *, nx=1, ny=1):
 
-    order = max(nx, ny)
+    """
+      :param x:                             abscissas, shape (points,)
+      :param y:                             ordinates, shape (points,)
+    Design matrix of x ** i * y ** j terms, shape (points, (nx + 1) * (ny + 1)), in the row-major order of the
+    coefficients returned by polyfit2d. Terms of total degree i + j > max(nx, ny) are zeroed.
+    """
 
-    # Convert input lists into numpy arrays if needed
-    x = np.array(x) if isinstance(x, list) else x
-    y = np.array(y) if isinstance(y, list) else y
-    z = np.array(z) if isinstance(z, list) else z
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
 
-    # Number of coefficients
-    N = (nx + 1) * (ny + 1)
+    i, j = np.indices((nx + 1, ny + 1)).reshape(2, -1)
+    A = x[:, None] ** i * y[:, None] ** j
+    A[:, i + j > max(nx, ny)] = 0
+
+    return A
+
+
+# Pseudo-inverses of recent design matrices, least recently used first, bounded in bytes
+_FACTORISATION_BYTES = 256 * 2 ** 20  # [B]
+_factorisations: OrderedDict = OrderedDict()
+_factorisationLock = threading.Lock()
+
+
+def _factorise(x: np.ndarray, y: np.ndarray, nx: int, ny: int) -> tuple[np.ndarray, int]:
+
+    # Keyed on a digest of the abscissas & ordinates, rather than on copies of them
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(x)
+    hasher.update(y)
+    key = (hasher.digest(), len(x), nx, ny)
 
-    # Matrix-form least-square problem: find X to approach A*X = B
-    X = np.ones((nx + 1, ny + 1))
-    B = z  # Scattered data to fit a surface from
-    A = np.zeros((N, len(B)))
+    with _factorisationLock:
+        if key in _factorisations:
+            _factorisations.move_to_end(key)
+            return _factorisations[key]
 
-    for index, (i, j) in enumerate(np.ndindex(X.shape)):
-        A[index] = x ** i * y ** j if i + j <= order else 0
+    # Pseudo-inverse of the design matrix (as numpy.linalg.lstsq, minimum-norm for rank-deficient problems)
+    A = vandermonde2d(x, y, nx=nx, ny=ny)
+    U, s, Vt = np.linalg.svd(A, full_matrices=False)
 
-    coeffs, residuals, _, _ = np.linalg.lstsq(A.T, z, rcond=None)
+    rcond = np.finfo(np.float64).eps * max(A.shape)
+    keep = s > rcond * s.max() if len(s) and s.max() > 0 else np.zeros(len(s), dtype=bool)
+    pseudoInverse = (Vt[keep].T / s[keep]) @ U[:, keep].T
+    pseudoInverse.flags.writeable = False
+    factorisation = (pseudoInverse, int(keep.sum()))
+
+    if pseudoInverse.nbytes <= _FACTORISATION_BYTES:
+        with _factorisationLock:
+            _factorisations[key] = factorisation
+            while sum(entry[0].nbytes for entry in _factorisations.values()) > _FACTORISATION_BYTES:
+                _factorisations.popitem(last=False)
+
+    return factorisation
+
+
+def _clearFactorisations():
+    with _factorisationLock:
+        _factorisations.clear()
+
+
+def polyfit2d(x, y, z, *, nx=1, ny=1, returnResiduals=False):
+
+    """
+      :param x:                             abscissas, shape (points,)
+      :param y:                             ordinates, shape (points,)
+      :param z:                             values, shape (points,) or (points, surfaces) to fit many surfaces at once
+    Least-square coefficients c[i, j] of x ** i * y ** j, shape (nx + 1, ny + 1) or (nx + 1, ny + 1, surfaces).
+    The factorisation of the design matrix is cached (up to _FACTORISATION_BYTES), so refitting over the same
+    (x, y) is a matrix product.
+    """
+
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    z = np.asarray(z, dtype=np.float64)
+
+    pseudoInverse, rank = _factorise(x, y, nx, ny)
+    coeffs = pseudoInverse @ z
 
     if not returnResiduals:
-        return coeffs.reshape((nx + 1, ny + 1))
+        return coeffs.reshape((nx + 1, ny + 1) + z.shape[1:])
+
+    # Sum of squared residuals, only defined for full-rank overdetermined problems (as numpy.linalg.lstsq)
+    N = (nx + 1) * (ny + 1)
+    if rank == N and len(z) > N:
+        residuals = np.atleast_1d(((vandermonde2d(x, y, nx=nx, ny=ny) @ coeffs - z) ** 2).sum(axis=0))
     else:
-        return coeffs.reshape((nx + 1, ny + 1)), residuals
+        residuals = np.empty(0)
+
+    return coeffs.reshape((nx + 1, ny + 1) + z.shape[1:]), residuals
+
+
+def polyval2d(x, y, coeffs, *, chunkSize=65536):
+
+    """
+      :param x:                             abscissas, any shape (e.g., meshgrid), broadcast against y
+      :param y:                             ordinates
+      :param coeffs:                        polyfit2d coefficients, shape (nx + 1, ny + 1) or (nx + 1, ny + 1, surfaces)
+    Evaluate fitted surfaces, shape of x & y (+ (surfaces,) for batched coefficients). A single surface is evaluated
+    by nested Horner schemes; batched surfaces by products of design matrices, chunkSize points at a time.
+    """
+
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    coeffs = np.asarray(coeffs, dtype=np.float64)
+
+    if coeffs.ndim == 2:
+        result = np.zeros(x.shape)
+        for i in reversed(range(coeffs.shape[0])):
+            inner = np.zeros(x.shape)
+            for j in reversed(range(coeffs.shape[1])):
+                inner = inner * y + coeffs[i, j]
+            result = result * x + inner
+        return result
+
+    nx, ny = coeffs.shape[0] - 1, coeffs.shape[1] - 1
+    C = coeffs.reshape(-1, coeffs.shape[2])
+    shape = x.shape
+    x, y = x.ravel(), y.ravel()
+
+    result = np.empty((len(x), C.shape[1]))
+    for start in range(0, len(x), chunkSize):
+        X = x[start:start + chunkSize, None] ** np.arange(nx + 1)
+        Y = y[start:start + chunkSize, None] ** np.arange(ny + 1)
+        result[start:start + chunkSize] = (X[:, :, None] * Y[:, None, :]).reshape(len(X), -1) @ C
+
+    return result.reshape(shape + (C.shape[1],))
 
 
 def convertRate(rate, outputInputRatio):
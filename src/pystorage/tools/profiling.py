@@ -0,0 +1,225 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+import contextlib
+import functools
+import json
+import time
+
+""" Opt-in instrumentation
+
+Models and data loaders time named stages (e.g., 'levelisedCostOfStorage.financial') and count events (e.g., unit
+conversions and file reads) only while a profile is active:
+
+    from pystorage.tools.profiling import profile
+
+    with profile() as p:
+        ES = DataDrivenElectricityStorageTechnology().withInputs(dataSource='PNNL_CAES', ...)
+        ES.levelisedCostOfStorage
+    p.summary()            # printed table
+    p.report()             # dict, see also p.toJSON()
+
+Stages nested at runtime are recorded under their path, e.g., 'withInputs/data.interpolationIndex'. When no profile
+is active, instrumented code only checks a module-level flag.
+"""
+
+_active: Profile | None = None
+
+
+""" Data classes """
+
+
+@dataclass
+class StageStatistics:
+    calls: int = 0
+    total: float = 0.  # [s]
+    maximum: float = 0.  # [s]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.
+
+
+@dataclass
+class Profile:
+    stages: dict[str, StageStatistics] = field(default_factory=dict)  # Path of nested stages: statistics
+    counters: dict[str, int] = field(default_factory=dict)  # e.g., 'unitConversions', 'fileReads'
+    _stack: list = field(default_factory=list, repr=False)
+
+    def _record(self, path: str, elapsed: float):
+        statistics = self.stages.get(path)
+        if statistics is None:
+            statistics = self.stages[path] = StageStatistics()
+        statistics.calls += 1
+        statistics.total += elapsed
+        statistics.maximum = max(statistics.maximum, elapsed)
+
+    def report(self) -> dict:
+
+        """
+        Aggregated statistics: {'stages': {path: {calls, total, mean, maximum}}, 'counters': {name: count}}, times in s.
+        """
+
+        return {'stages': {path: {'calls': s.calls, 'total': s.total, 'mean': s.mean, 'maximum': s.maximum}
+                           for path, s in self.stages.items()},
+                'counters': dict(self.counters)}
+
+    def toJSON(self, path: str | None = None, **kwargs) -> str:
+
+        """
+          :param path:                          also write the report to this file (optional)
+        """
+
+        text = json.dumps(self.report(), **kwargs)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+
+        return text
+
+    def summary(self, display: bool = True):
+
+        """
+          :param display:                       print the summary (rich table) rather than returning it
+        Stages sorted by total time, followed by the counters.
+        """
+
+        from rich.table import Table
+
+        table = Table(title='pyStorage profile')
+        table.add_column('Stage / counter')
+        table.add_column('Calls', justify='right')
+        table.add_column('Total [ms]', justify='right')
+        table.add_column('Mean [ms]', justify='right')
+        table.add_column('Max [ms]', justify='right')
+
+        for path, s in sorted(self.stages.items(), key=lambda item: -item[1].total):
+            table.add_row(path, str(s.calls), f'{1e3 * s.total:.3f}', f'{1e3 * s.mean:.3f}',
+                          f'{1e3 * s.maximum:.3f}')
+        for name, value in sorted(self.counters.items()):
+            table.add_row(f'[italic]{name}[/italic]', str(value), '', '', '')
+
+        if not display:
+            return table
+
+        from rich.console import Console
+        Console().print(table)
+
+
+""" Instrumentation hooks """
+
+
+class _Stage:
+
+    __slots__ = ('profile', 'name', 'start')
+
+    def __init__(self, profile: Profile, name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile._stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        elapsed = time.perf_counter() - self.start
+        self.profile._record('/'.join(self.profile._stack), elapsed)
+        self.profile._stack.pop()
+        return False
+
+
+_NULL = contextlib.nullcontext()
+
+
+def stage(name: str):
+
+    """
+      :param name:                          e.g., 'levelisedCostOfStorage.financial'
+    Context manager timing a stage of the active profile (no-op otherwise).
+    """
+
+    if _active is None:
+        return _NULL
+    return _Stage(_active, name)
+
+
+def timed(name: str):
+
+    """
+      :param name:                          stage name, e.g., 'data.loadCEPCI'
+    Decorator timing every call of a function as a stage of the active profile.
+    """
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return function(*args, **kwargs)
+            with _Stage(_active, name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name: str, n: int = 1):
+
+    """
+      :param name:                          e.g., 'unitConversions', 'fileReads'
+    Increment a counter of the active profile (no-op otherwise).
+    """
+
+    if _active is not None:
+        _active.counters[name] = _active.counters.get(name, 0) + n
+
+
+""" Activation """
+
+
+def enableProfiling() -> Profile:
+
+    """
+    Start collecting into a new profile (process-wide), returned for later inspection.
+    """
+
+    global _active
+    _active = Profile()
+    return _active
+
+
+def disableProfiling() -> Profile | None:
+
+    global _active
+    profile, _active = _active, None
+    return profile
+
+
+def activeProfile() -> Profile | None:
+    return _active
+
+
+@contextlib.contextmanager
+def profile(*, display: bool = False):
+
+    """
+      :param display:                       print the summary on exit
+    Context manager collecting a profile of the enclosed code, e.g.:
+        with pystorage.tools.profiling.profile() as p:
+            ...
+        p.report()
+    The previously active profile (if any) is restored on exit.
+    """
+
+    global _active
+
+    previous = _active
+    _active = Profile()
+    current = _active
+    try:
+        yield current
+    finally:
+        _active = previous
+        if display:
+            current.summary()
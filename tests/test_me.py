@@ -76,3 +76,734 @@ def test_LCOS_DataDriven():
     LCOS = ES.levelisedCostOfStorage.to('USD/MWh').magnitude
 
     assert LCOS is not None and len(LCOS) == 3
+
+
+# Test the binary tariff store is built once, sliced without copies and rebuilt when stale
+def test_TariffCache(tmp_path, monkeypatch):
+
+    import json
+    import numpy as np
+    from pystorage.data import __tariffs__ as tariffs
+    from pystorage.data import loadYearlyTariff
+
+    monkeypatch.setenv('PYSTORAGE_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(tariffs, '_stores', {})
+
+    time, price, unit = loadYearlyTariff(2019, 'Bulgaria')
+    assert unit == 'EUR/MWh' and len(time) == len(price) == 8760
+    assert isinstance(price.base, np.memmap) or isinstance(price, np.memmap)
+    assert (time.astype('datetime64[Y]').astype(int) + 1970 == 2019).all()
+
+    # Invalidate the stored signature: the store must be rebuilt from the CSV
+    metaFile = tmp_path / 'Bulgaria' / 'meta.json'
+    meta = json.loads(metaFile.read_text())
+    meta['signature'] = [0, 0]
+    metaFile.write_text(json.dumps(meta))
+    monkeypatch.setattr(tariffs, '_stores', {})
+
+    _, rebuiltPrice, _ = loadYearlyTariff(2019, 'Bulgaria')
+    assert np.array_equal(price, rebuiltPrice)
+    assert json.loads(metaFile.read_text())['signature'] != [0, 0]
+
+    # Per-user cache directory by default, never the installed package
+    monkeypatch.delenv('PYSTORAGE_CACHE_DIR')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg'))
+    assert tariffs.cacheDirectory() == str(tmp_path / 'xdg' / 'pystorage')
+    monkeypatch.setenv('XDG_CACHE_HOME', 'relative')
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    assert tariffs.cacheDirectory() == str(tmp_path / 'home' / '.cache' / 'pystorage')
+
+
+# Test `import pystorage` is lazy, side-effect free and within its startup budget
+def test_ImportBudget():
+
+    import os
+    import subprocess
+    import sys
+    import pystorage
+
+    configDirectory = os.path.join(os.path.dirname(pystorage.__file__), 'config')
+    configFiles = {file: os.stat(os.path.join(configDirectory, file)).st_mtime_ns
+                   for file in os.listdir(configDirectory)}
+
+    script = ("import sys, time; t = time.perf_counter(); import pystorage; dt = time.perf_counter() - t; "
+              "import pystorage.config; "
+              "heavy = [m for m in ['pint', 'pandas', 'scipy', 'pystorage.data', 'pystorage.systems'] "
+              "if m in sys.modules]; print(dt, *heavy)")
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+    importTime, *heavyModules = output.stdout.split()
+
+    assert float(importTime) < 0.05  # [s]
+    assert not heavyModules
+    assert configFiles == {file: os.stat(os.path.join(configDirectory, file)).st_mtime_ns
+                           for file in os.listdir(configDirectory)}
+
+
+# Test the lazy unit registry is built once when first accessed from several threads
+def test_RegistryThreads(monkeypatch):
+
+    import threading
+    import time
+    from pystorage import config
+
+    calls = []
+
+    def build():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)  # Slow build: every thread arrives before the registry exists
+        return object()
+
+    monkeypatch.delattr(config, 'ureg', raising=False)
+    monkeypatch.setattr(config, 'defineAdditionalUnits', build)
+
+    registries = []
+    threads = [threading.Thread(target=lambda: registries.append(config.ureg)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and len(registries) == 8 and all(registry is registries[0] for registry in registries)
+
+
+# Test scene & units are scoped to context managers, threads and asyncio tasks
+def test_SceneScopes():
+
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from pystorage.config import scene
+
+    with scene(country='Ireland', year=2020, currency='EUR'):
+        ES = ElectricityStorageTechnology()
+        assert (ES.country, ES.year, ES.units['energySpecificCost']) == ('Ireland', 2020, 'EUR/kWh')
+        with scene(year=2022):
+            assert getTheScene() == {'Country': 'Ireland', 'Year': 2022}
+        assert getTheScene() == {'Country': 'Ireland', 'Year': 2020}
+
+    assert getTheScene() == {'Country': 'UK', 'Year': 2024} and getUnits()['currency'] == 'USD'
+
+    def worker(country):
+        with scene(country=country, currency='GBP'):
+            return ElectricityStorageTechnology().country, getUnits()['currency']
+
+    countries = ['Bulgaria', 'Croatia', 'Serbia', 'Ireland'] * 8
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(worker, countries)) == [(country, 'GBP') for country in countries]
+
+    async def task(year):
+        with scene(year=year):
+            await asyncio.sleep(0)
+            return getTheScene()['Year']
+
+    async def gather():
+        return await asyncio.gather(*[task(year) for year in range(2015, 2025)])
+
+    assert asyncio.run(gather()) == list(range(2015, 2025))
+    assert getTheScene()['Year'] == 2024
+
+
+# Test batch LCOS evaluation matches the object-based calculation over a design grid
+def test_LCOS_Batch():
+
+    import numpy as np
+    import pytest
+    from pint import DimensionalityError
+    from pystorage.systems import batchLevelisedCostOfStorage
+
+    durations, powers = np.array([4., 8., 12.]), np.array([100., 200.])
+    discountRates = np.array([3.5, 7.])
+
+    batch = batchLevelisedCostOfStorage(
+        dataSource='PNNL_CAES',
+        dischargeDuration=Q_(durations[:, None, None], 'hour'),
+        dischargingPower=Q_(powers[None, :, None], 'MW'),
+        chargingPower=Q_(powers[None, :, None], 'MW'),
+        selfDischargeRate=Q_(0.5, '%/hour'),
+        cyclesPerYear=100,
+        standby=0.1,
+        discountRate=Q_(discountRates[None, None, :], '%'),
+        lifetime=Q_(60, 'year'),
+        electricityPrice=Q_(79.68, 'USD/MWh'),
+        gasPrice=Q_(31.27, 'USD/MWh'))
+
+    assert batch.shape == (3, 2, 2) and batch.bounds == ('LB', 'nominal', 'UB')
+
+    for index in np.ndindex(batch.shape):
+        ES = DataDrivenElectricityStorageTechnology().withInputs(
+            dataSource='PNNL_CAES',
+            dischargeDuration=Q_(durations[index[0]], 'hour'),
+            dischargingPower=Q_(powers[index[1]], 'MW'),
+            chargingPower=Q_(powers[index[1]], 'MW'),
+            selfDischargeRate=Q_(0.5, '%/hour'),
+            cyclesPerYear=100,
+            standby=0.1,
+            discountRate=Q_(discountRates[index[2]], '%'),
+            lifetime=Q_(60, 'year'))
+        ES.update(electricityPrice=Q_(79.68, 'USD/MWh'), gasPrice=Q_(31.27, 'USD/MWh'))
+
+        assert np.allclose(batch.values[index].to('USD/MWh').magnitude,
+                           ES.levelisedCostOfStorage.to('USD/MWh').magnitude)
+
+    # Wrong units are rejected, as in withInputs
+    design = dict(dischargeDuration=Q_(4, 'hour'), dischargingPower=Q_(100, 'MW'), chargingPower=Q_(100, 'MW'),
+                  roundtripEfficiency=Q_(70, '%'), powerIslandSpecificCost=Q_(1000, 'USD/kW'),
+                  storeSpecificCost=Q_(10, 'USD/kWh'), selfDischargeRate=Q_(0.1, '%/hour'), cyclesPerYear=100,
+                  standby=0., discountRate=Q_(5, '%'), lifetime=Q_(30, 'year'), electricityPrice=Q_(80, 'USD/MWh'))
+    assert np.isfinite(batchLevelisedCostOfStorage(**design).values.magnitude).all()
+    for name, value in [('dischargeDuration', Q_(4, 'MW')), ('electricityPrice', Q_(80, 'MW')),
+                        ('storeSpecificCost', Q_(10, 'USD/kW'))]:
+        with pytest.raises((ValueError, DimensionalityError)):
+            batchLevelisedCostOfStorage(**dict(design, **{name: value}))
+
+
+# Test compiled units give the same LCOS as pint conversions, and reject wrong dimensions
+def test_CompiledUnits():
+
+    import numpy as np
+    import pytest
+    from pystorage.config import scene
+
+    def LCOS():
+        ES = DataDrivenElectricityStorageTechnology().withInputs(
+            dataSource='PNNL_CAES',
+            dischargeDuration=Q_(6, 'hour'),
+            dischargingPower=Q_(150, 'MW'),
+            chargingPower=Q_(150, 'MW'),
+            selfDischargeRate=Q_(0.5, '%/hour'),
+            cyclesPerYear=100,
+            standby=0.1,
+            discountRate=Q_(3.5, '%'),
+            lifetime=Q_(60, 'year'))
+        ES.update(electricityPrice=Q_(70, 'EUR/MWh'), gasPrice=Q_(25, 'GBP/MWh'))
+        return ES.levelisedCostOfStorage
+
+    with scene(currency='GBP', compiledUnits=True):
+        compiled = LCOS()
+    with scene(currency='GBP', compiledUnits=False):
+        reference = LCOS()
+
+    assert compiled.units == reference.units and np.allclose(compiled.magnitude, reference.magnitude)
+
+    with pytest.raises(ValueError):
+        ElectricityStorageTechnology().withInputs(dischargeDuration=Q_(5, 'MW'))
+
+
+# Test the parallel scenario sweep is deterministic and matches a serial run
+def test_ScenarioSweep():
+
+    from pystorage.systems import scenarioGrid, runSweep
+
+    scenarios = scenarioGrid(
+        countries=['Ireland', 'Bulgaria'],
+        years=[2020, 2021],
+        dischargeDuration=Q_(4, 'hour'),
+        dischargingPower=Q_(100, 'MW'),
+        chargingPower=Q_(100, 'MW'),
+        selfDischargeRate=Q_(0.5, '%/hour'),
+        cyclesPerYear=100,
+        standby=0.1,
+        discountRate=[Q_(3.5, '%'), Q_(7, '%')],
+        lifetime=Q_(60, 'year'),
+        gasPrice=Q_(31.27, 'USD/MWh'))
+
+    serial = runSweep(scenarios, workers=1, progress=False)
+    parallel = runSweep(scenarios, workers=2, progress=False, batchSize=3)
+
+    assert len(scenarios) == 8 and serial.equals(parallel)
+    assert list(parallel['scenario']) == list(range(8))
+    assert (parallel['LCOS_LB'] <= parallel['LCOS']).all() and (parallel['LCOS'] <= parallel['LCOS_UB']).all()
+
+
+# Test the dispatch optimiser on a known price profile, in batch, and fed into the LCOS
+def test_Dispatch():
+
+    import numpy as np
+    from pystorage.systems import optimiseDispatch
+    from pystorage.data import extractAndResampleYearlyData
+
+    # Cheap then expensive hours: charge fully, then discharge fully
+    prices = np.r_[np.full(4, 10.), np.full(4, 100.)]
+    schedule = optimiseDispatch(prices, power=[1., 2.], duration=Q_(3, 'hour'), roundtripEfficiency=0.75,
+                                timeStep=1.)
+    assert np.allclose(schedule.stateOfCharge[:, -1], 0)
+    assert np.allclose(schedule.discharge.sum(axis=1), [3., 6.]) and np.allclose(schedule.cycles, 1.)
+    assert np.allclose(schedule.revenue, [3 * 100 - 4 * 10, 6 * 100 - 8 * 10])
+    assert np.all(schedule.charge <= np.array([[1.], [2.]]) + 1e-9)
+
+    tariff, unit = extractAndResampleYearlyData(timeStep=1., year=2020, country='Ireland')
+    ES = ElectricityStorageTechnology().withInputs(
+        dischargeDuration=Q_(4, 'hour'),
+        dischargingPower=Q_(100, 'MW'),
+        chargingPower=Q_(100, 'MW'),
+        roundtripEfficiency=Q_(75, '%'),
+        powerIslandSpecificCost=Q_(1000, 'USD/kW'),
+        storeSpecificCost=Q_(50, 'USD/kWh'),
+        selfDischargeRate=Q_(0.1, '%/hour'),
+        discountRate=Q_(3.5, '%'),
+        lifetime=Q_(30, 'year'),
+        standby=0.)
+
+    schedule = optimiseDispatch(tariff, storage=ES)
+    assert schedule.revenue[0] > 0 and 0 < schedule.cyclesPerYear[0] < 8766 / 8
+    assert np.all(schedule.stateOfCharge >= 0) and np.all(schedule.stateOfCharge <= 400 + 1e-9)
+
+    ES.update(**schedule.lcosInputs(unit))
+    assert ES.cyclesPerYear == round(schedule.cyclesPerYear[0]) and ES.levelisedCostOfStorage.magnitude > 0
+
+
+# Test the dispatch optimiser with negative prices, fractional charge steps, self-discharge and a year at 15 min
+def test_DispatchRobustness():
+
+    import time
+    import numpy as np
+    from pystorage.systems import optimiseDispatch
+    from pystorage.data import extractAndResampleYearlyData
+
+    # Negative prices: infeasible actions stay infeasible whatever the sign of the price
+    prices = np.r_[np.full(4, -5.), np.full(4, 100.)]
+    schedule = optimiseDispatch(prices, power=[1., 1.], duration=[1., 3.], roundtripEfficiency=0.8, timeStep=1.)
+    assert np.all(schedule.stateOfCharge >= -1e-9) and np.all(schedule.stateOfCharge <= [[1.], [3.]])
+    assert np.allclose(schedule.discharge[:, 4], 1.) and np.all(schedule.revenue > 0)
+
+    # Charging reaches its nominal power although it is not a whole number of levels per step
+    tariff, unit = extractAndResampleYearlyData(timeStep=0.25, year=2020, country='Ireland')
+    elapsed, revenue = [], []
+    for rate in [0., 0.01]:
+        times = []
+        for _ in range(3):  # Best of three runs
+            start = time.perf_counter()
+            schedule = optimiseDispatch(tariff, power=100., duration=4., roundtripEfficiency=0.746,
+                                        selfDischargeRate=rate)
+            times.append(time.perf_counter() - start)
+        elapsed.append(min(times))
+        revenue.append(schedule.revenue[0])
+        assert np.isclose(schedule.charge.max(), 100.) and np.isclose(schedule.discharge.max(), 100.)
+
+        # Energy balance: stored energy within bounds, changed by the applied actions only (and self-discharge)
+        SOC = schedule.stateOfCharge[0]
+        decay = (1 - rate) ** 0.25
+        assert SOC.min() >= 0 and SOC.max() <= 400 + 1e-9
+        assert np.allclose(SOC[1:] / decay - SOC[:-1], (0.746 * schedule.charge[0] - schedule.discharge[0]) * 0.25)
+    assert max(elapsed) < 1. and revenue[1] < revenue[0]
+
+    # Batches of designs simulated at once: far cheaper than one run per design, with the same schedules
+    batch = []
+    for _ in range(2):
+        start = time.perf_counter()
+        schedule = optimiseDispatch(tariff, power=np.full(10, 100.), duration=4., roundtripEfficiency=0.746,
+                                    selfDischargeRate=0.01)
+        batch.append(time.perf_counter() - start)
+    assert min(batch) < 5 * elapsed[1] and np.allclose(schedule.revenue, revenue[1])
+
+    # Close to the revenue on a finer grid
+    fine = optimiseDispatch(tariff, power=100., duration=4., roundtripEfficiency=0.746, resolution=8)
+    assert revenue[0] <= fine.revenue[0] * 1.001 and revenue[0] > 0.99 * fine.revenue[0]
+
+
+# Test the multi-year tariff iterator aligns years, cycles missing ones and splits windows
+def test_TariffIterator():
+
+    import numpy as np
+    import pytest
+    from pystorage.data import iterateTariffs, extractAndResampleYearlyData, completeYears
+
+    chunks = list(iterateTariffs(country='Ireland', startYear=2020, lifetime=Q_(7, 'year'), fill='cycle'))
+    assert [chunk.year for chunk in chunks] == list(range(2020, 2027))
+    assert [chunk.sourceYear for chunk in chunks][-2:] == [2018, 2019]  # Complete years only (2015-2021), in turn
+    assert [len(chunk.tariff) for chunk in chunks][:2] == [8784, 8760]
+    assert chunks[-1].tariff.index[0] == np.datetime64('2026-01-01T00:00')
+
+    tariff, _ = extractAndResampleYearlyData(timeStep=1., year=2020, country='Ireland')
+    assert np.allclose(chunks[0].tariff.values, tariff.values[:-1])
+
+    weeks = list(iterateTariffs(country='Ireland', years=[2020], window=24 * 7))
+    assert len(weeks) == 53 and np.allclose(np.concatenate([week.tariff.values for week in weeks]),
+                                            chunks[0].tariff.values)
+
+    with pytest.raises(ValueError):
+        next(iterateTariffs(country='UK', years=[2030]))
+
+    # Incomplete years (Bulgaria 2016 starts in October) are missing: substituted when filling, raised otherwise
+    assert 2016 not in completeYears('Bulgaria') and 2017 in completeYears('Bulgaria')
+    chunk = next(iterateTariffs(country='Bulgaria', years=[2016], fill='cycle'))
+    assert chunk.sourceYear != 2016 and len(chunk.tariff) == 8784 and not np.isnan(chunk.tariff.values).any()
+    with pytest.raises(ValueError):
+        next(iterateTariffs(country='Bulgaria', years=[2016]))
+
+
+# Test batched polyfit2d against numpy's least squares, and polyval2d against numpy's evaluator
+def test_Polyfit2d(monkeypatch):
+
+    import numpy as np
+    import pystorage.tools.math
+    from pystorage.tools.math import vandermonde2d, polyfit2d, polyval2d
+
+    rng = np.random.default_rng(0)
+    x, y, z = rng.random(200), rng.random(200), rng.random((200, 3))
+
+    coeffs = polyfit2d(x, y, z, nx=2, ny=3)
+    assert coeffs.shape == (3, 4, 3)
+    for k in range(3):
+        reference = np.linalg.lstsq(vandermonde2d(x, y, nx=2, ny=3), z[:, k], rcond=None)[0].reshape(3, 4)
+        assert np.allclose(polyfit2d(x, y, z[:, k], nx=2, ny=3), reference)
+        assert np.allclose(coeffs[..., k], reference)
+
+    X, Y = np.meshgrid(np.linspace(0, 1, 7), np.linspace(0, 2, 5))
+    values = polyval2d(X, Y, coeffs)
+    assert values.shape == (5, 7, 3)
+    assert np.allclose(values[..., 1], np.polynomial.polynomial.polyval2d(X, Y, coeffs[..., 1]))
+    assert np.allclose(polyval2d(X, Y, coeffs[..., 1]), values[..., 1])
+
+    # Full-rank problem: residuals as numpy.linalg.lstsq
+    _, residuals = polyfit2d(x, y, z[:, 0], nx=0, ny=0, returnResiduals=True)
+    assert np.allclose(residuals, ((z[:, 0] - z[:, 0].mean()) ** 2).sum())
+
+    # Factorisations cached within a byte budget, least recently used evicted first
+    monkeypatch.setattr(pystorage.tools.math, '_FACTORISATION_BYTES', 3 * 16 * 200 * 8)
+    pystorage.tools.math._clearFactorisations()
+    for k in range(5):
+        polyfit2d(x + k, y, z, nx=3, ny=3)
+    assert len(pystorage.tools.math._factorisations) == 3
+    assert np.allclose(polyfit2d(x + 4, y, z, nx=3, ny=3), polyfit2d(x.copy() + 4, y.copy(), z, nx=3, ny=3))
+
+
+# Test the shared interpolation index: vectorised queries, extrapolation flags and registration of a new dataset
+def test_InterpolationIndex():
+
+    import numpy as np
+    import pytest
+    from pystorage.data import PNNL_CAES, interpolationIndex, registerDataSource, availableDataSources
+
+    index = interpolationIndex('PNNL_CAES')
+    assert index is interpolationIndex('PNNL_CAES')  # Built once
+
+    values, extrapolated = index(PNNL_CAES['duration'].magnitude, PNNL_CAES['power'].magnitude)
+    assert values.shape == (10, 8) and not extrapolated.any()
+    assert np.allclose(values[:, index.field('storeSpecificCost')], PNNL_CAES['storeSpecificCost'].magnitude)
+
+    values, extrapolated = index([6, 3], [150, 50])
+    assert list(extrapolated) == [False, True] and np.isnan(values[1]).all()
+    values, _ = index([3], [50], extrapolation='nearest')
+    assert np.allclose(values[0], index([4], [100])[0][0])
+    with pytest.raises(ValueError):
+        index([3], [50], extrapolation='raise')
+
+    # Same data under another name, with costs in GBP
+    def loader():
+        data = dict(PNNL_CAES)
+        for key in ['powerIslandSpecificCost_LB', 'powerIslandSpecificCost', 'powerIslandSpecificCost_UB']:
+            data[key] = Q_(data[key].to('GBP/kW', 'conversion').magnitude, 'GBP/kW')
+        return data
+
+    registerDataSource('PNNL_CAES_GBP', loader, type='D-CAES', model='PNNL', referenceYear=2023,
+                       secondarySource='gas')
+    assert 'PNNL_CAES_GBP' in availableDataSources()
+
+    inputs = dict(dischargeDuration=Q_(8, 'hour'), dischargingPower=Q_(300, 'MW'))
+    ES = DataDrivenElectricityStorageTechnology().withInputs(dataSource='PNNL_CAES_GBP', **inputs)
+    reference = DataDrivenElectricityStorageTechnology().withInputs(dataSource='PNNL_CAES', **inputs)
+    assert ES.type == 'D-CAES' and not ES.extrapolated
+    assert np.allclose(ES.powerIslandSpecificCost.magnitude, reference.powerIslandSpecificCost.magnitude)
+
+
+# Test Monte Carlo LCOS: degenerate distributions match the batch evaluation, and results do not depend on workers
+def test_MonteCarlo():
+
+    import numpy as np
+    from pystorage.systems import sampleLevelisedCostOfStorage, batchLevelisedCostOfStorage, uniform, normal
+
+    design = dict(dischargeDuration=Q_(8, 'hour'), dischargingPower=Q_(300, 'MW'), chargingPower=Q_(300, 'MW'),
+                  selfDischargeRate=Q_(0.1, '%/hour'), cyclesPerYear=300, lifetime=Q_(30, 'year'),
+                  gasPrice=Q_(30, 'USD/MWh'))
+    reference = batchLevelisedCostOfStorage(dataSource='PNNL_CAES', discountRate=Q_(5, '%'),
+                                            electricityPrice=Q_(50, 'USD/MWh'), **design)
+
+    fixed = sampleLevelisedCostOfStorage(samples=1000, chunkSize=300, roundtripEfficiency=Q_(70, '%'),
+                                         powerIslandSpecificCost=uniform(Q_(1000, 'USD/kW'), Q_(1000, 'USD/kW')),
+                                         storeSpecificCost=Q_(10, 'USD/kWh'), discountRate=Q_(5, '%'),
+                                         electricityPrice=Q_(50, 'USD/MWh'), **design)
+    agnostic = batchLevelisedCostOfStorage(roundtripEfficiency=Q_(70, '%'), powerIslandSpecificCost=Q_(1000, 'USD/kW'),
+                                           storeSpecificCost=Q_(10, 'USD/kWh'), discountRate=Q_(5, '%'),
+                                           electricityPrice=Q_(50, 'USD/MWh'), **design)
+    assert fixed.samples == 1000 and np.isclose(fixed.mean, agnostic.sel('nominal').magnitude)
+    assert np.isclose(fixed.quantile(0.5), fixed.mean) and fixed.standardDeviation < 1e-12
+
+    inputs = dict(dataSource='PNNL_CAES', samples=200_000, chunkSize=2 ** 14, seed=7,
+                  discountRate=uniform(Q_(3, '%'), Q_(7, '%')),
+                  electricityPrice=normal(Q_(50, 'USD/MWh'), Q_(5, 'USD/MWh')), **design)
+    serial = sampleLevelisedCostOfStorage(**inputs)
+    parallel = sampleLevelisedCostOfStorage(workers=2, **inputs)
+    assert serial.mean == parallel.mean and np.array_equal(serial.histogram, parallel.histogram)
+
+    LB, nominal, UB = reference.values.magnitude
+    assert serial.samples == 200_000 and LB < serial.quantile(0.5) < UB
+    assert serial.quantile(0.05) < serial.quantile(0.5) < serial.quantile(0.95)
+
+    # Samples outside the domain of the inputs (negative prices & discount rates) are counted as invalid
+    skewed = sampleLevelisedCostOfStorage(**dict(inputs, samples=20_000, discountRate=normal(Q_(1, '%'), Q_(1, '%')),
+                                                 electricityPrice=normal(Q_(5, 'USD/MWh'), Q_(10, 'USD/MWh'))))
+    assert skewed.samples + skewed.invalid == 20_000
+    assert abs(skewed.invalid / 20_000 - (1 - 0.8413 * 0.6915)) < 0.02
+
+
+# Test benchmark comparison
+def test_BenchmarkComparison():
+
+    import importlib.util
+    import os
+
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'benchmark.py')
+    spec = importlib.util.spec_from_file_location('benchmark', path)
+    benchmark = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(benchmark)
+
+    baseline = {'results': {'a': {'time': 1., 'peakMemory': 100}, 'b': {'time': 1e-6, 'peakMemory': 100},
+                            'c': {'time': 1., 'peakMemory': 100}}}
+    current = {'results': {'a': {'time': 1.5, 'peakMemory': 100}, 'b': {'time': 1e-5, 'peakMemory': 100},
+                           'c': {'time': 1.1, 'peakMemory': 200}, 'd': {'time': 1., 'peakMemory': 100}}}
+    rows = {row['name']: row for row in benchmark.compareResults(current, baseline)}
+    assert rows['a']['regression'] and rows['c']['regression']
+    assert not rows['b']['regression']  # Below the noise threshold
+    assert rows['d']['timeRatio'] is None and not rows['d']['regression']
+
+
+# Test opt-in profiling
+def test_Profiling():
+
+    import json
+    from pystorage.systems import ElectricityStorageTechnology
+    from pystorage.tools import profiling
+
+    design = dict(dischargeDuration=Q_(4, 'hour'), dischargingPower=Q_(100, 'MW'), chargingPower=Q_(100, 'MW'),
+                  roundtripEfficiency=Q_(70, '%'), powerIslandSpecificCost=Q_(1000, 'USD/kW'),
+                  storeSpecificCost=Q_(10, 'USD/kWh'), selfDischargeRate=Q_(0.1, '%/hour'), cyclesPerYear=100,
+                  standby=0., discountRate=Q_(5, '%'),
+                  lifetime=Q_(30, 'year'))
+
+    ES = ElectricityStorageTechnology().withInputs(**design)
+    assert profiling.activeProfile() is None
+
+    with profiling.profile() as p:
+        ES = ElectricityStorageTechnology().withInputs(**design)
+        ES.update(electricityPrice=Q_(50, 'USD/MWh'))
+        LCOS = ES.levelisedCostOfStorage
+
+    assert profiling.activeProfile() is None and LCOS is not None
+    report = json.loads(p.toJSON())
+    assert {'withInputs', 'withInputs/assign', 'update/assign', 'levelisedCostOfStorage.financial'} \
+        <= set(report['stages'])
+    assert report['stages']['withInputs']['calls'] == 1
+    assert report['counters']['unitConversions'] > 0
+
+    # Nothing recorded once the profile is closed
+    ES.update(electricityPrice=Q_(60, 'USD/MWh'))
+    assert report == p.report()
+
+
+# Test multi-country tariff panel
+def test_TariffPanel():
+
+    import numpy as np
+    import pytest
+    from pystorage.data import loadTariffPanel, extractAndResampleYearlyData
+
+    hourly = loadTariffPanel(['UK', 'Ireland'], 2020, currency='GBP')
+    assert hourly.values.shape == (8784, 2) and hourly.unit == 'GBP/MWh'
+
+    # UK data: intervals labelled at their end, in CET/CEST (repeated hour on 25 Oct.)
+    UK, _ = extractAndResampleYearlyData(1., 2020, 'UK')
+    assert np.array_equal(hourly['UK'][:4], UK.values[1:5])
+    october = np.searchsorted(hourly.time, np.datetime64('2020-10-24T23:00'))
+    assert np.array_equal(hourly['UK'][october:october + 4], [5.12, 0.14, 0.08, -0.09])
+    assert np.isnan(hourly['UK'][-1])  # 1 Jan. 2021 00:00 CET not in the data
+
+    # Ember data: UTC, in EUR
+    Ireland, _ = extractAndResampleYearlyData(1., 2020, 'Ireland')
+    assert np.allclose(hourly['Ireland'] / 0.77 * 0.92, Ireland.values[:8784])
+
+    quarterly = loadTariffPanel(['UK', 'Ireland'], 2020, timeStep=0.25, currency='GBP')
+    assert np.array_equal(quarterly.values[::4], hourly.values, equal_nan=True)
+
+    daily = {a: loadTariffPanel(['UK', 'Ireland'], 2020, timeStep=24., aggregation=a, currency='GBP')
+             for a in ['mean', 'min', 'max']}
+    assert np.allclose(daily['mean'].values[1:-1], np.nanmean(hourly.values[24:-24].reshape(-1, 24, 2), axis=1))
+    assert np.array_equal(daily['max'].values[1:-1], np.nanmax(hourly.values[24:-24].reshape(-1, 24, 2), axis=1))
+    assert np.all(daily['min'].values <= daily['mean'].values)
+
+    with pytest.raises(ValueError):
+        loadTariffPanel('UK', 2030)
+
+
+# Test cost escalation table
+def test_EscalationTable():
+
+    import numpy as np
+    import pytest
+    from pystorage.config import scene
+    from pystorage.data import escalationTable, CEPCI
+    from pystorage.systems import ElectricityStorageTechnology, DataDrivenElectricityStorageTechnology
+
+    table = escalationTable()
+    assert table.cepci(2024) == CEPCI[2024] and not table.interpolated[table.years == 2024].any()
+    assert np.isclose(table.cepci(2017), CEPCI[2015] + 2 / 5 * (CEPCI[2020] - CEPCI[2015]))
+    assert table.interpolated[np.isin(table.years, [2016, 2017, 2018, 2019])].all()
+
+    # Costs of mixed base years & currencies, converted at once
+    costs = np.array([100., 100., 100.])
+    converted = table.convert(costs, fromYear=[2020, 2024, 2024], toYear=2024, fromCurrency=['USD', 'USD', 'GBP'])
+    assert np.allclose(converted, [100 * CEPCI[2024] / CEPCI[2020], 100, 100 / 0.77])
+    assert np.allclose(Q_(100, 'GBP').to('EUR', 'conversion').magnitude,
+                       table.convert(100, fromYear=2024, toYear=2024, fromCurrency='GBP', toCurrency='EUR'))
+
+    with pytest.raises(ValueError):
+        table.factor(fromYear=1900, toYear=2024)
+    with pytest.raises(ValueError):
+        table.factor(fromYear=2024, toYear=2024, fromCurrency='JPY')
+
+    # Years missing from the CEPCI data, for both technology classes
+    with scene(country='UK', year=2018, currency='GBP'):
+        ES = ElectricityStorageTechnology()
+        assert np.isclose(ES.CEPCI, table.cepci(2018))
+        assert np.allclose(ES.escalateCosts([100., 200.], year=2024), np.array([100., 200.]) * 0.77 * ES.CEPCI
+                           / CEPCI[2024])
+
+        CAES = DataDrivenElectricityStorageTechnology().withInputs(dataSource='PNNL_CAES',
+                                                                   dischargeDuration=Q_(8, 'hour'),
+                                                                   dischargingPower=Q_(300, 'MW'))
+        assert CAES.powerIslandSpecificCost is not None
+
+
+# Test memoised model results
+def test_ResultCache(tmp_path, monkeypatch):
+
+    import json
+    import numpy as np
+    from pystorage.config import scene
+    from pystorage.systems import ResultCache, evaluateTechnology, resultKey, ElectricityStorageTechnology
+    from pystorage.systems import resultCache
+
+    design = dict(dischargeDuration=Q_(4, 'hour'), dischargingPower=Q_(100, 'MW'), chargingPower=Q_(100, 'MW'),
+                  roundtripEfficiency=Q_(70, '%'), powerIslandSpecificCost=Q_(1000, 'USD/kW'),
+                  storeSpecificCost=Q_(10, 'USD/kWh'), selfDischargeRate=Q_(0.1, '%/hour'), cyclesPerYear=100,
+                  standby=0., discountRate=Q_(5, '%'), lifetime=Q_(30, 'year'), electricityPrice=Q_(50, 'USD/MWh'))
+
+    # Canonical keys: keyword order & int/float spelling do not matter; the scene & units do
+    assert resultKey(None, design) == resultKey(None, dict(reversed(design.items()), cyclesPerYear=100.))
+    assert resultKey(None, design) != resultKey(None, dict(design, cyclesPerYear=101))
+    key = resultKey(None, design)
+    with scene(currency='GBP'):
+        assert resultKey(None, design) != key
+    with scene(year=2020):
+        assert resultKey(None, design) != key
+
+    cache = ResultCache(directory=str(tmp_path / 'results'))
+    result = evaluateTechnology(cache=cache, **design)
+    assert evaluateTechnology(cache=cache, **design) is result
+    assert cache.statistics['hits'] == 1 and cache.statistics['misses'] == 1
+
+    inputs = {key: value for key, value in design.items() if key != 'electricityPrice'}
+    ES = ElectricityStorageTechnology().withInputs(**inputs)
+    ES.update(electricityPrice=design['electricityPrice'])
+    assert result.levelisedCostOfStorage == ES.levelisedCostOfStorage
+
+    # On-disk tier shared with another cache (e.g., another process)
+    shared = ResultCache(directory=str(tmp_path / 'results'))
+    assert np.isclose(evaluateTechnology(cache=shared, **design).levelisedCostOfStorage.magnitude,
+                      result.levelisedCostOfStorage.magnitude)
+    assert shared.statistics['diskHits'] == 1
+
+    # Bounded LRU tier
+    small = ResultCache(maxEntries=2)
+    for price in [50, 60, 70, 50]:
+        evaluateTechnology(cache=small, **dict(design, electricityPrice=Q_(price, 'USD/MWh')))
+    assert len(small) == 2 and small.statistics['evictions'] == 2 and small.statistics['hits'] == 0
+
+    # Editing a data file invalidates the results
+    data = tmp_path / 'data.csv'
+    data.write_text('1')
+    monkeypatch.setattr(resultCache, '_dataFiles', lambda: ((str(data), 'data.csv'),))
+    key = resultKey(None, design, refresh=True)
+    data.write_text('12')
+    assert resultKey(None, design) == key  # Data files checked at most every _VERSION_INTERVAL
+    assert resultKey(None, design, refresh=True) != key
+    monkeypatch.setattr(resultCache, '_VERSION_INTERVAL', 0.)
+    key = resultKey(None, design)
+    data.write_text('123')
+    assert resultKey(None, design) != key
+
+    # On-disk tier stored as JSON (no code execution upon loading); corrupted files are misses
+    files = list((tmp_path / 'results').rglob('*.json'))
+    assert files and json.loads(files[0].read_text())['levelisedCostOfStorage']['units']
+    files[0].write_text('{')
+    assert ResultCache(directory=str(tmp_path / 'results')).get(files[0].stem) is None
+
+    # Default cache when cache is True
+    assert evaluateTechnology(cache=True, **design) is evaluateTechnology(**design)
+
+    # Re-registering a data source (same metadata, other data) changes the keys at once
+    from pystorage.data import PNNL_CAES, registerDataSource, __sources__ as sources
+    monkeypatch.setattr(sources, '_dataSources', dict(sources._dataSources))
+    monkeypatch.setattr(resultCache, '_VERSION_INTERVAL', 60.)
+    registerDataSource('PNNL_CAES_COPY', lambda: dict(PNNL_CAES), type='D-CAES', model='PNNL', referenceYear=2023)
+    key = resultKey('PNNL_CAES_COPY', design, refresh=True)
+    registerDataSource('PNNL_CAES_COPY', lambda: {name: 2 * value for name, value in PNNL_CAES.items()},
+                       type='D-CAES', model='PNNL', referenceYear=2023)
+    assert resultKey('PNNL_CAES_COPY', design) != key
+
+
+# Test batched state-of-charge simulation
+def test_StateOfChargeSimulation():
+
+    import numpy as np
+    import pytest
+    from pystorage.systems import simulateStateOfCharge, optimiseDispatch, ElectricityStorageTechnology
+
+    rng = np.random.default_rng(1)
+    prices = rng.uniform(0, 100, 500)
+    power, duration, eta_in, eta_out, r = np.array([10., 50.]), np.array([2., 6.]), 0.9, 0.8, 0.002
+    setpoint = rng.uniform(-60, 60, (2, 500))
+
+    simulation = simulateStateOfCharge(prices, power=power, duration=duration, chargingEfficiency=eta_in,
+                                       dischargingEfficiency=eta_out, selfDischargeRate=r, setpoint=setpoint,
+                                       initialStateOfCharge=0.5, timeStep=0.5, traces=True)
+
+    # Scalar reference: stored energy as grid energy deliverable, round-trip losses upon charge
+    for k in range(2):
+        capacity = power[k] * duration[k]
+        stored, revenue = 0.5 * capacity, 0.
+        for t in range(500):
+            P_in = min(max(setpoint[k, t], 0), power[k], (capacity - stored) / (eta_in * eta_out * 0.5))
+            P_out = min(max(-setpoint[k, t], 0), power[k], stored / 0.5)
+            stored = (stored + (P_in * eta_in * eta_out - P_out) * 0.5) * (1 - r) ** 0.5
+            revenue += (P_out - P_in) * prices[t] * 0.5
+        assert np.isclose(simulation.finalStateOfCharge[k], stored) and np.isclose(simulation.revenue[k], revenue)
+
+    assert simulation.stateOfCharge.shape == (2, 501)
+    assert np.allclose(simulation.charge.sum(axis=1) * 0.5, simulation.charged)
+    assert np.all(simulation.maximumStateOfCharge <= simulation.capacity + 1e-9)
+    assert np.allclose(simulation.capacity * 0.5 + simulation.charged * eta_in * eta_out - simulation.discharged
+                       - simulation.selfDischarge, simulation.finalStateOfCharge)
+
+    # Price thresholds across a batch of storage objects, without traces
+    storage = [ElectricityStorageTechnology().withInputs(dischargeDuration=Q_(duration, 'hour'),
+                                                         dischargingPower=Q_(100, 'MW'), chargingPower=Q_(100, 'MW'),
+                                                         roundtripEfficiency=Q_(81, '%'))
+               for duration in [2, 4, 8]]
+    batch = simulateStateOfCharge(prices, storage=storage, chargeBelow=25., dischargeAbove=75., timeStep=1.)
+    assert batch.stateOfCharge is None and batch.revenue.shape == (3,)
+    assert np.all(batch.revenue > 0) and np.all(batch.chargingPrice <= 25.)
+    assert batch.lcosInputs('EUR/MWh', 1)['cyclesPerYear'] == int(round(batch.cyclesPerYear[1]))
+
+    # Same conventions as the dispatch: its schedule, replayed as setpoints, yields the same states & revenue
+    schedule = optimiseDispatch(prices, power=[10., 20.], duration=[2., 3.], roundtripEfficiency=0.81,
+                                selfDischargeRate=0.01, timeStep=1.)
+    replay = simulateStateOfCharge(prices, power=[10., 20.], duration=[2., 3.], roundtripEfficiency=0.81,
+                                   selfDischargeRate=0.01, setpoint=schedule.charge - schedule.discharge,
+                                   timeStep=1., traces=True)
+    assert np.allclose(replay.stateOfCharge, schedule.stateOfCharge) and np.allclose(replay.revenue, schedule.revenue)
+    assert np.allclose(replay.cyclesPerYear, schedule.cyclesPerYear)
+
+    with pytest.raises(ValueError):
+        simulateStateOfCharge(prices, power=10., duration=2., roundtripEfficiency=0.8, chargeBelow=50.,
+                              dischargeAbove=40., timeStep=1.)